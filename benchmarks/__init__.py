@@ -0,0 +1,9 @@
+"""Synthetic data generator and benchmark suite for the expense tracker
+
+Point the DB_* settings at a scratch database (or set DB_BACKEND=sqlite and
+SQLITE_PATH for a serverless run), then:
+
+    python -m benchmarks generate --users 3 --rows 100000
+    python -m benchmarks run --out before.json
+    python -m benchmarks compare before.json after.json
+"""
@@ -0,0 +1,60 @@
+"""Command-line entry point: python -m benchmarks {generate,run,compare}"""
+import argparse
+import json
+import sys
+
+import expenseTrackerUpdated as et
+from benchmarks import datagen, suite
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    p = sub.add_parser("generate", help="create synthetic benchmark users (replaces existing ones)")
+    p.add_argument("--users", type=int, default=1)
+    p.add_argument("--rows", type=int, default=10_000, help="expenses per user")
+    p.add_argument("--years", type=float, default=3, help="history length")
+    p.add_argument("--seed", type=int, default=0)
+    
+    p = sub.add_parser("run", help="time the core operations and write a JSON report")
+    p.add_argument("--user", default=datagen.bench_username(0))
+    p.add_argument("--repeat", type=int, default=10, help="samples per cold/warm phase")
+    p.add_argument("--only", nargs="+", help="operation name prefixes to run")
+    p.add_argument("--out", help="report file (default: stdout)")
+    
+    p = sub.add_parser("compare", help="show p50 changes between two reports")
+    p.add_argument("old")
+    p.add_argument("new")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    if args.command == "compare":
+        with open(args.old) as old, open(args.new) as new:
+            rows = suite.compare(json.load(old), json.load(new))
+        et.emit(rows, "table", sys.stdout)
+        return 0
+    
+    conn = et.get_connection()
+    try:
+        et.migrate(conn)
+        if args.command == "generate":
+            datagen.generate(conn, args.users, args.rows, args.years, args.seed)
+            return 0
+        
+        report = suite.run_suite(conn, args.user, args.repeat, args.only)
+    finally:
+        conn.close()
+    
+    text = json.dumps(report, indent=2, sort_keys=True, default=str) + "\n"
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+        print(f"✅ Report written to {args.out}")
+    else:
+        sys.stdout.write(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
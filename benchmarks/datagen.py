@@ -0,0 +1,113 @@
+"""Generate realistic synthetic users, expenses and income"""
+from datetime import date, timedelta
+import numpy as np
+
+import expenseTrackerUpdated as et
+
+BENCH_PASSWORD = "bench"
+INSERT_BATCH = 5000
+
+# category: (share of expenses, median amount in ₹, spread, descriptions)
+CATEGORY_PROFILES = {
+    "Food": (0.34, 250, 0.7, ["Lunch", "Dinner out", "Coffee", "Groceries", "Snacks", "Swiggy order"]),
+    "Transport": (0.20, 120, 0.8, ["Uber ride", "Metro card", "Auto", "Fuel", "Parking"]),
+    "Shopping": (0.14, 1200, 1.0, ["Amazon order", "Clothes", "Shoes", "Electronics", "Gift"]),
+    "Bills": (0.12, 1500, 0.5, ["Electricity bill", "Mobile recharge", "Internet", "Water bill", "Rent"]),
+    "Entertainment": (0.10, 450, 0.6, ["Netflix", "Movie tickets", "Concert", "Games", "Spotify"]),
+    "Other": (0.10, 300, 1.2, ["Pharmacy", "Haircut", "Donation", "Stationery", "Laundry"]),
+}
+
+def bench_username(number):
+    return f"bench_{number:04d}"
+
+def create_user(conn, username, monthly_budget):
+    """(Re)create a benchmark user and return its id; an existing user's data is dropped"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM users WHERE username=%s", (username,))
+        cursor.execute(
+            "INSERT INTO users (username, password, monthly_budget) VALUES (%s, %s, %s)",
+            (username, et.hash_password(BENCH_PASSWORD), monthly_budget)
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+
+def synthetic_expenses(rng, rows, years, batch=INSERT_BATCH):
+    """Yield lists of up to `batch` (date, category, amount, description) tuples spread over the last `years` years
+    
+    Each batch covers its own slice of the date range, so rows come out in date
+    order and only one batch is held in memory at a time.
+    """
+    names = list(CATEGORY_PROFILES)
+    weights = np.array([CATEGORY_PROFILES[name][0] for name in names])
+    all_medians = np.array([CATEGORY_PROFILES[name][1] for name in names])
+    all_spreads = np.array([CATEGORY_PROFILES[name][2] for name in names])
+    
+    days = int(365 * years)
+    start = date.today() - timedelta(days=days)
+    for first in range(0, rows, batch):
+        size = min(batch, rows - first)
+        low, high = days * first // rows, days * (first + size) // rows
+        offsets = np.sort(rng.integers(low, max(high, low + 1), size))
+        categories = rng.choice(len(names), size, p=weights / weights.sum())
+        medians, spreads = all_medians[categories], all_spreads[categories]
+        amounts = np.round(np.clip(rng.lognormal(np.log(medians), spreads), 1, 99_999_999), 2)
+        picks = rng.integers(0, 1 << 30, size)
+        
+        expenses = []
+        for offset, category, amount, pick in zip(offsets.tolist(), categories.tolist(), amounts.tolist(), picks.tolist()):
+            descriptions = CATEGORY_PROFILES[names[category]][3]
+            expenses.append((start + timedelta(days=offset), names[category], amount, descriptions[pick % len(descriptions)]))
+        yield expenses
+
+def synthetic_income(rng, years, salary):
+    """Return (date, amount, description) tuples: a monthly salary plus occasional freelance work"""
+    rows = []
+    month = date.today().replace(day=1) - timedelta(days=int(365 * years))
+    while month <= date.today():
+        month = month.replace(day=1)
+        rows.append((month, salary, "Salary"))
+        if rng.random() < 0.15:
+            rows.append((month + timedelta(days=int(rng.integers(5, 25))),
+                         round(float(rng.lognormal(np.log(8000), 0.5)), 2), "Freelance project"))
+        month += timedelta(days=32)
+    return rows
+
+def generate_user(conn, username, rows, years=3, seed=0):
+    """Create one user with `rows` expenses and matching income; returns the user id"""
+    rng = np.random.default_rng(seed)
+    salary = round(float(rng.uniform(30_000, 150_000)), -3)
+    user_id = create_user(conn, username, round(salary * 0.6, -3))
+    
+    income = synthetic_income(rng, years, salary)
+    category_ids = {name: et.get_category_id(conn, name) for name in CATEGORY_PROFILES}
+    conn.commit()
+    
+    cursor = conn.cursor()
+    try:
+        for expenses in synthetic_expenses(rng, rows, years):
+            cursor.executemany(et.SQL_INSERT_EXPENSE, [
+                (user_id, day, category, amount, description, category_ids[category])
+                for day, category, amount, description in expenses
+            ])
+            conn.commit()
+        cursor.executemany(et.SQL_INSERT_INCOME, [(user_id,) + row for row in income])
+        et.recompute_rollups(cursor, user_id)
+        et.bump_data_version(conn, user_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return user_id
+
+def generate(conn, users=1, rows=10_000, years=3, seed=0):
+    """Generate `users` benchmark users with `rows` expenses each; returns their ids"""
+    ids = []
+    for number in range(users):
+        ids.append(generate_user(conn, bench_username(number), rows, years, seed + number))
+        print(f"✅ {bench_username(number)}: {rows:,} expenses")
+    return ids
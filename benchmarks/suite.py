@@ -0,0 +1,169 @@
+"""Time the core operations and build a diffable JSON report"""
+from datetime import datetime
+import contextlib
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import expenseTrackerUpdated as et
+
+PAGE_COLUMNS = "id, date, category, amount, description"
+
+def middle_anchor(conn, user_id):
+    """Return the (date, id) keyset anchor half way through the user's expenses"""
+    count = et.fetch_one(conn, "SELECT COUNT(*) FROM expenses WHERE user_id=%s", (user_id,))[0]
+    return et.fetch_one(
+        conn,
+        "SELECT date, id FROM expenses WHERE user_id=%s ORDER BY date DESC, id DESC LIMIT 1 OFFSET %s",
+        (user_id, count // 2)
+    )
+
+def operations(conn, user_id, monthly_budget, scratch):
+    """Return (name, run, reset) for every benchmarked operation
+    
+    reset clears the application caches the operation relies on; cold runs
+    call it before every sample. Operations without caches have reset None
+    and their cold figure is the first call of the session.
+    """
+    anchor = middle_anchor(conn, user_id)
+    charts_dir = os.path.join(scratch, "charts")
+    
+    def clear_charts():
+        shutil.rmtree(charts_dir, ignore_errors=True)
+    
+    def clear_frames():
+        et.frame_cache.invalidate(user_id)
+    
+    return [
+        ("view_expenses.first_page",
+         lambda: list(et.fetch_page(conn, "expenses", PAGE_COLUMNS, user_id)), None),
+        ("view_expenses.middle_page",
+         lambda: list(et.fetch_page(conn, "expenses", PAGE_COLUMNS, user_id, anchor)), None),
+        ("show_summary",
+         lambda: et.get_summary(conn, user_id, monthly_budget), None),
+        ("show_charts.draw",
+         lambda: et.show_charts(conn, user_id, out_dir=os.path.join(scratch, "drawn")), None),
+        ("show_charts.cached",
+         lambda: et.render_charts(conn, user_id, out_dir=charts_dir), clear_charts),
+        ("load_user_data",
+         lambda: et.load_user_data(conn, user_id), clear_frames),
+        ("search.substring",
+         lambda: et.search_transactions(conn, user_id, "coffee"), None),
+        ("search.prefix",
+         lambda: et.search_transactions(conn, user_id, "uber", prefix=True), None),
+        ("insights.prompt",
+         lambda: et.build_insights_prompt(conn, user_id, monthly_budget), None),
+        ("export.csv",
+         lambda: et.export_transactions(conn, os.path.join(scratch, "export"), "csv", user_id), None),
+    ]
+
+def sample(run, reset=None):
+    """Return the wall time of one call in milliseconds"""
+    if reset:
+        reset()
+    started = time.perf_counter()
+    run()
+    return (time.perf_counter() - started) * 1000
+
+def peak_memory(run, reset=None):
+    """Return the peak Python heap allocation of one call in KiB"""
+    if reset:
+        reset()
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+def summarize(timings, peak_kib):
+    return {
+        "runs": len(timings),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(et.percentile(timings, 50), 3),
+        "p90_ms": round(et.percentile(timings, 90), 3),
+        "p99_ms": round(et.percentile(timings, 99), 3),
+        "max_ms": round(max(timings), 3),
+        "peak_kib": peak_kib,
+    }
+
+def benchmark(run, reset, repeat):
+    """Measure cold and warm timings plus memory peaks of one operation"""
+    cold = [sample(run, reset) for _ in range(repeat if reset else 1)]
+    cold_peak = peak_memory(run, reset)
+    run()  # warm up
+    warm = [sample(run) for _ in range(repeat)]
+    return {"cold": summarize(cold, cold_peak), "warm": summarize(warm, peak_memory(run))}
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(et.__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(conn, username, repeat=10, only=None):
+    """Benchmark every operation for one user and return the report dict"""
+    row = et.fetch_one(conn, "SELECT id, monthly_budget FROM users WHERE username=%s", (username,))
+    if row is None:
+        raise ValueError(f"user {username} not found; run 'generate' first")
+    user_id, monthly_budget = row
+    et.use_headless_backend()
+    
+    expenses, income = et.fetch_one(
+        conn,
+        """SELECT (SELECT COUNT(*) FROM expenses WHERE user_id=%s),
+                  (SELECT COUNT(*) FROM income WHERE user_id=%s)""",
+        (user_id, user_id)
+    )
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": et.storage.describe(),
+            "user": username,
+            "expenses": expenses,
+            "income": income,
+            "repeat": repeat,
+        },
+        "operations": {},
+    }
+    
+    scratch = tempfile.mkdtemp(prefix="expense-bench-")
+    try:
+        for name, run, reset in operations(conn, user_id, monthly_budget, scratch):
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+                result = benchmark(run, reset, repeat)
+            report["operations"][name] = result
+            print(f"{name:<28} cold p50 {result['cold']['p50_ms']:>10.2f} ms   "
+                  f"warm p50 {result['warm']['p50_ms']:>10.2f} ms   peak {result['warm']['peak_kib']:>8,} KiB",
+                  file=sys.stderr)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return report
+
+def compare(old, new):
+    """Return per-operation warm/cold p50 ratios (new / old) of two reports"""
+    rows = []
+    for name, result in new["operations"].items():
+        before = old["operations"].get(name)
+        if before is None:
+            continue
+        row = {"operation": name}
+        for phase in ("cold", "warm"):
+            was, now = before[phase]["p50_ms"], result[phase]["p50_ms"]
+            row[f"{phase}_p50_ms"] = f"{was} -> {now}"
+            row[f"{phase}_ratio"] = round(now / was, 2) if was else None
+        rows.append(row)
+    return rows
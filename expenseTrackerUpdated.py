@@ -1,6 +1,6 @@
 """
 💰 EXPENSE TRACKER APPLICATION
-A complete personal finance management system with MySQL database
+A complete personal finance management system with a MySQL or SQLite database
 
 """
 
@@ -8,52 +8,781 @@ A complete personal finance management system with MySQL database
 # IMPORTS
 # ============================================================================
 import mysql.connector
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
+import mysql.connector.pooling
+from mysql.connector import errorcode
+from datetime import date, datetime
 import hashlib
+import importlib
+import subprocess
+import argparse
+import atexit
+import http.server
+import secrets
+import urllib.parse
+import logging
+import logging.handlers
+import contextlib
+import json
+import csv
+import glob
+import sqlite3
+import threading
+import re
+from decimal import Decimal
+from functools import lru_cache
+import queue
+import random
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict, defaultdict
+from types import SimpleNamespace
 import sys
-import google.generativeai as genai
+import time
 import os
 from dotenv import load_dotenv
 os.environ['GRPC_DNS_RESOLVER'] = 'native'
 load_dotenv()
 api_key = os.getenv("G_API_KEY")
-if api_key:
-    genai.configure(api_key=api_key)
-    GEMINI_ENABLED = True
-else:
-    GEMINI_ENABLED = False
+GEMINI_ENABLED = bool(api_key)
+
+# ============================================================================
+# LAZY IMPORTS
+# ============================================================================
+# pandas, matplotlib, seaborn and the Gemini SDK take seconds to import, so
+# they are only loaded when a menu action first touches them.
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access"""
+    def __init__(self, name, on_import=None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_import:
+                self._on_import(module)
+            self._module = module
+        return getattr(self._module, attr)
+
+def configure_gemini(module):
+    """Configure the Gemini SDK with the API key once it is imported"""
+    if api_key:
+        module.configure(api_key=api_key)
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+plt = LazyModule("matplotlib.pyplot")
+sns = LazyModule("seaborn")
+genai = LazyModule("google.generativeai", on_import=configure_gemini)
+
+# Modules that must not be imported just by starting the app
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "seaborn", "google.generativeai")
+
+def startup_report(top=15):
+    """Measure the app's import time with `python -X importtime` and list the slowest imports"""
+    module_name = os.path.splitext(os.path.basename(__file__))[0]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        imports.append((name, int(self_us), int(cumulative_us)))
+    
+    own = next((cumulative for name, _, cumulative in imports if name == module_name), 0)
+    heavy = sorted({name for name, _, _ in imports if name.startswith(HEAVY_MODULES)})
+    
+    print("\n" + "="*60)
+    print("⏱️  STARTUP IMPORT REPORT")
+    print("="*60)
+    print(f"Total import time: {own / 1000:.1f} ms")
+    print(f"{'Module':<40} {'Cumulative (ms)':>15}")
+    print("="*60)
+    for name, _, cumulative in sorted(imports, key=lambda i: i[2], reverse=True)[:top]:
+        print(f"{name:<40} {cumulative / 1000:>15.1f}")
+    print("="*60)
+    if heavy:
+        print(f"⚠️  Heavy modules imported at startup: {', '.join(heavy)}")
+    else:
+        print("✅ No heavy modules imported at startup")
+    
+    return {"total_ms": own / 1000, "heavy_modules": heavy,
+            "imports": [{"module": name, "self_us": self_us, "cumulative_us": cumulative_us}
+                        for name, self_us, cumulative_us in imports]}
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", "chart_cache")
+# Render charts to files instead of windows (default: when there is no display)
+CHARTS_HEADLESS = os.getenv(
+    "CHARTS_HEADLESS",
+    "1" if sys.platform.startswith("linux") and not (os.getenv("DISPLAY") or os.getenv("WAYLAND_DISPLAY")) else "0"
+) == "1"
 
 # ============================================================================
 # DATABASE CONNECTION
 # ============================================================================
+# DB_BACKEND picks the storage backend: "mysql" (a server, the default) or
+# "sqlite" (a local file, no server needed). Connection settings come from
+# the environment / .env file, falling back to the local development defaults.
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "3306")),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", "1234"),
+    "database": os.getenv("DB_NAME", "expense_tracker"),
+    "connection_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10")),
+}
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+SQLITE_PATH = os.getenv("SQLITE_PATH", "expense_tracker.db")
+
+# WAL lets readers run alongside the single writer; with it, synchronous=NORMAL
+# is still crash-safe and avoids an fsync per commit.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": "-65536",  # 64 MiB
+    "mmap_size": "268435456",
+}
+
+DB_ERRORS = (mysql.connector.Error, sqlite3.Error)
+DB_INTEGRITY_ERRORS = (mysql.connector.IntegrityError, sqlite3.IntegrityError)
+
+_pool = None
+
+def get_pool():
+    """Return the process-wide MySQL connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        _pool = mysql.connector.pooling.MySQLConnectionPool(
+            pool_name="expense_tracker",
+            pool_size=DB_POOL_SIZE,
+            # Resetting the session would drop the cached prepared statements
+            pool_reset_session=False,
+            **DB_CONFIG
+        )
+    return _pool
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" ", "seconds"))
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+
+class SQLiteCursor(sqlite3.Cursor):
+    """sqlite3 cursor that accepts the MySQL-flavoured SQL used throughout the app"""
+    def execute(self, sql, params=None):
+        return super().execute(sqlite_sql(sql), params or ())
+    
+    def executemany(self, sql, seq_of_params):
+        return super().executemany(sqlite_sql(sql), seq_of_params)
+
+class SQLiteConnection(sqlite3.Connection):
+    """sqlite3 connection accepting mysql-connector's cursor() options
+    
+    SQLite cursors are always buffered and statements are prepared through
+    SQLite's own statement cache, so the options are accepted and ignored.
+    """
+    unread_result = False
+    
+    def cursor(self, factory=SQLiteCursor, buffered=None, prepared=False):
+        return super().cursor(factory)
+
+class MySQLBackend:
+    """MySQL server reached through a mysql-connector connection pool"""
+    name = "mysql"
+    search = "fulltext"
+    
+    def describe(self):
+        return f"MySQL database '{DB_CONFIG['database']}' on {DB_CONFIG['host']}"
+    
+    def connect(self, timeout=None):
+        """Check a connection out of the pool, waiting up to timeout seconds for one to free up"""
+        timeout = DB_POOL_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return get_pool().get_connection()
+            except mysql.connector.errors.PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+    
+    def migrations(self):
+        return MIGRATIONS
+    
+    def is_missing_table(self, error):
+        return getattr(error, "errno", None) == errorcode.ER_NO_SUCH_TABLE
+    
+    def explain(self, conn, query, params):
+        """Return the plan of query as {key, type, rows, extra}"""
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("EXPLAIN " + query, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        first = rows[0]
+        return {
+            "key": first["key"], "type": first["type"], "rows": first["rows"], "extra": first.get("Extra") or "",
+            "rows_examined": sum(row["rows"] or 0 for row in rows),
+            "plan": rows,
+        }
+    
+    def connect_help(self):
+        return [
+            "MySQL server is running",
+            f"Database '{DB_CONFIG['database']}' exists",
+            "Username and password are correct (DB_USER / DB_PASSWORD)",
+        ]
+
+class SQLiteBackend:
+    """Local SQLite file in WAL mode; one connection per caller, no server"""
+    name = "sqlite"
+    search = "trigram"
+    
+    def __init__(self, path=None):
+        self.path = path or SQLITE_PATH
+    
+    def describe(self):
+        return f"SQLite database {self.path}"
+    
+    def connect(self, timeout=None):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=DB_POOL_TIMEOUT if timeout is None else timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            factory=SQLiteConnection,
+            check_same_thread=False,
+        )
+        for pragma, value in SQLITE_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        return conn
+    
+    def migrations(self):
+        return SQLITE_MIGRATIONS
+    
+    def is_missing_table(self, error):
+        return isinstance(error, sqlite3.OperationalError) and "no such table" in str(error)
+    
+    def explain(self, conn, query, params):
+        """Return the plan of query as {key, type, rows, extra}
+        
+        type uses MySQL's names for the first table access: "range" when the
+        index search has a </> bound, "ref" for equality only, "ALL" for a scan.
+        """
+        details = [row[-1] for row in fetch_all(conn, "EXPLAIN QUERY PLAN " + query, params)]
+        match = re.search(r"USING (?:COVERING )?INDEX (\w+)", " ".join(details))
+        access = next((detail for detail in details if detail.startswith(("SEARCH", "SCAN"))), "")
+        if not access.startswith("SEARCH"):
+            access_type = "ALL"
+        else:
+            access_type = "range" if re.search(r"\(.*[<>].*\)", access) else "ref"
+        return {
+            "key": match.group(1) if match else None,
+            "type": access_type,
+            "rows": "-",
+            "extra": "filesort" if any("TEMP B-TREE" in detail for detail in details) else "",
+            "rows_examined": None,  # SQLite plans carry no row estimates
+            "plan": details,
+        }
+    
+    def connect_help(self):
+        return [f"The directory for {self.path} exists and is writable (SQLITE_PATH)"]
+
+BACKENDS = {"mysql": MySQLBackend, "sqlite": SQLiteBackend}
+storage = BACKENDS[DB_BACKEND]()
+
+def get_connection(timeout=None):
+    """Return an instrumented connection from the configured storage backend"""
+    return InstrumentedConnection(storage.connect(timeout))
+
 def create_connection():
-    """Create and return MySQL database connection"""
+    """Create and return a database connection, exiting with hints on failure"""
     try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",  
-            password="1234", 
-            database="expense_tracker"
-        )
-        print("✅ Connected to MySQL database")
+        conn = get_connection()
+        print(f"✅ Connected to {storage.describe()}")
         return conn
-    except mysql.connector.Error as e:
-        print(f"❌ Error connecting to MySQL: {e}")
+    except DB_ERRORS as e:
+        print(f"❌ Error connecting to {storage.describe()}: {e}")
         print("Make sure:")
-        print("  1. MySQL server is running")
-        print("  2. Database 'expense_tracker' exists")
-        print("  3. Username and password are correct")
+        for number, hint in enumerate(storage.connect_help(), 1):
+            print(f"  {number}. {hint}")
         sys.exit(1)
 
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+# Every cursor handed out by get_connection() counts its queries, fetched rows
+# and (approximate) bytes into the action running on the current thread;
+# track_action() adds the elapsed time and folds the counts into per-action
+# totals. Time spent waiting at prompt() is booked apart as input_seconds, so
+# the action time of interactive menus is only the work done. Totals are
+# merged into STATS_PATH when the program exits so the stats command can
+# report on many runs.
+STATS_PATH = os.getenv("STATS_PATH", ".expense_stats.json")
+STATS_FIELDS = ("calls", "seconds", "max_seconds", "input_seconds", "queries", "rows", "bytes")
+
+_action_stats = {}
+_stats_lock = threading.Lock()
+_current_action = threading.local()
+
+def row_bytes(rows):
+    """Approximate wire size of fetched rows (text length, 8 bytes per number)"""
+    total = 0
+    for row in rows:
+        for value in (row.values() if isinstance(row, dict) else row):
+            if isinstance(value, (str, bytes, bytearray)):
+                total += len(value)
+            elif value is not None:
+                total += 8
+    return total
+
+def record_query(queries=0, rows=()):
+    """Add a query and/or fetched rows to the current action"""
+    counts = getattr(_current_action, "counts", None)
+    if counts is None:
+        with _stats_lock:
+            counts = _action_stats.setdefault("unattributed", dict.fromkeys(STATS_FIELDS, 0))
+            counts["queries"] += queries
+            counts["rows"] += len(rows)
+            counts["bytes"] += row_bytes(rows)
+        return
+    counts["queries"] += queries
+    counts["rows"] += len(rows)
+    counts["bytes"] += row_bytes(rows)
+
+@contextlib.contextmanager
+def track_action(name):
+    """Time the enclosed block and attribute its queries to the action `name`"""
+    previous = getattr(_current_action, "counts", None)
+    counts = {"input_seconds": 0.0, "queries": 0, "rows": 0, "bytes": 0}
+    _current_action.counts = counts
+    started = time.perf_counter()
+    try:
+        yield counts
+    finally:
+        elapsed = time.perf_counter() - started - counts["input_seconds"]
+        _current_action.counts = previous
+        if previous is not None:
+            # The enclosing action's time also excludes prompts inside this one
+            previous["input_seconds"] += counts["input_seconds"]
+        with _stats_lock:
+            totals = _action_stats.setdefault(name, dict.fromkeys(STATS_FIELDS, 0))
+            totals["calls"] += 1
+            totals["seconds"] += elapsed
+            totals["max_seconds"] = max(totals["max_seconds"], elapsed)
+            for field, value in counts.items():
+                totals[field] += value
+
+def prompt(text=""):
+    """input() that books the time spent waiting for the user to the current action's input_seconds"""
+    started = time.perf_counter()
+    try:
+        return input(text)
+    finally:
+        counts = getattr(_current_action, "counts", None)
+        if counts is not None:
+            counts["input_seconds"] += time.perf_counter() - started
+
+class InstrumentedCursor:
+    """Cursor proxy that reports queries and fetched rows to record_query
+    
+    It also times each statement from execute() until its results are
+    consumed (or the next execute/close) and hands slow ones to
+    log_slow_query. `conn` is the connection used to EXPLAIN them.
+    """
+    def __init__(self, cursor, conn=None):
+        self._cursor = cursor
+        self._conn = conn
+        self._pending = None
+    
+    def execute(self, sql, params=None):
+        self._finish()
+        started = time.perf_counter()
+        result = self._cursor.execute(sql, params)
+        self._start(sql, params, started)
+        return result
+    
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        seq_of_params = list(seq_of_params)
+        started = time.perf_counter()
+        result = self._cursor.executemany(sql, seq_of_params)
+        self._start(sql, seq_of_params, started, many=True)
+        return result
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched([] if row is None else [row], started, done=row is None)
+        return row
+    
+    def fetchmany(self, size=1):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._fetched(rows, started, done=len(rows) < size)
+        return rows
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(rows, started, done=True)
+        return rows
+    
+    def __iter__(self):
+        rows = iter(self._cursor)
+        while True:
+            started = time.perf_counter()
+            row = next(rows, None)
+            if row is None:
+                self._fetched([], started, done=True)
+                return
+            self._fetched([row], started)
+            yield row
+    
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+    
+    def _start(self, sql, params, started, many=False):
+        record_query(queries=1)
+        self._pending = {"sql": sql, "params": params, "many": many, "rows": 0,
+                         "seconds": time.perf_counter() - started}
+        if self._cursor.description is None:  # no result set to wait for
+            self._finish()
+    
+    def _fetched(self, rows, started, done=False):
+        record_query(rows=rows)
+        if self._pending is not None:
+            self._pending["seconds"] += time.perf_counter() - started
+            self._pending["rows"] += len(rows)
+            if done:
+                self._finish()
+    
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None and SLOW_QUERY_MS >= 0 and pending["seconds"] * 1000 >= SLOW_QUERY_MS:
+            log_slow_query(self._conn, pending)
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+def instrument(cursor, conn=None):
+    return cursor if isinstance(cursor, InstrumentedCursor) else InstrumentedCursor(cursor, conn)
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are instrumented; everything else is passed through"""
+    def __init__(self, conn):
+        self._conn = conn
+    
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self)
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def stats_snapshot():
+    """Return per-action totals: the saved ones from STATS_PATH plus this process's"""
+    totals = {}
+    if STATS_PATH and os.path.exists(STATS_PATH):
+        with open(STATS_PATH) as f:
+            totals = json.load(f)
+    with _stats_lock:
+        for action, counts in _action_stats.items():
+            saved = totals.setdefault(action, dict.fromkeys(STATS_FIELDS, 0))
+            for field in STATS_FIELDS:
+                if field == "max_seconds":
+                    saved[field] = max(saved[field], counts[field])
+                else:
+                    saved[field] = saved.get(field, 0) + counts[field]  # older files lack input_seconds
+    return totals
+
+def save_stats():
+    """Merge this process's totals into STATS_PATH (registered with atexit)"""
+    if not STATS_PATH or not _action_stats:
+        return
+    totals = stats_snapshot()
+    tmp = f"{STATS_PATH}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(totals, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATS_PATH)
+    with _stats_lock:
+        _action_stats.clear()
+
+def reset_stats():
+    with _stats_lock:
+        _action_stats.clear()
+    if STATS_PATH and os.path.exists(STATS_PATH):
+        os.remove(STATS_PATH)
+
+def stats_rows(totals):
+    """Flatten per-action totals into report rows, slowest total first"""
+    return [
+        {
+            "action": action,
+            "calls": counts["calls"],
+            "total_ms": round(counts["seconds"] * 1000, 1),
+            "avg_ms": round(counts["seconds"] * 1000 / counts["calls"], 1) if counts["calls"] else 0,
+            "max_ms": round(counts["max_seconds"] * 1000, 1),
+            "input_ms": round(counts.get("input_seconds", 0) * 1000, 1),
+            "queries": counts["queries"],
+            "rows": counts["rows"],
+            "bytes": counts["bytes"],
+        }
+        for action, counts in sorted(totals.items(), key=lambda item: -item[1]["seconds"])
+    ]
+
+def prometheus_stats(totals):
+    """Render per-action totals in the Prometheus text exposition format"""
+    metrics = [
+        ("calls", "expense_tracker_action_calls_total", "counter", "Times the action ran"),
+        ("seconds", "expense_tracker_action_seconds_total", "counter", "Time spent in the action, prompts excluded"),
+        ("max_seconds", "expense_tracker_action_max_seconds", "gauge", "Slowest single run of the action"),
+        ("input_seconds", "expense_tracker_action_input_seconds_total", "counter", "Time spent waiting at prompts"),
+        ("queries", "expense_tracker_action_queries_total", "counter", "SQL statements executed"),
+        ("rows", "expense_tracker_action_rows_total", "counter", "Rows fetched"),
+        ("bytes", "expense_tracker_action_bytes_total", "counter", "Approximate bytes fetched"),
+    ]
+    lines = []
+    for field, metric, kind, help_text in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for action, counts in sorted(totals.items()):
+            label = action.replace("\\", "\\\\").replace('"', '\\"')
+            value = counts.get(field, 0)
+            lines.append(f'{metric}{{action="{label}"}} {value if isinstance(value, int) else repr(float(value))}')
+    return "\n".join(lines) + "\n"
+
+def dump_stats(path, fmt="json"):
+    """Write the current totals to path as JSON or Prometheus text"""
+    totals = stats_snapshot()
+    with open(path, "w") as f:
+        if fmt == "prometheus":
+            f.write(prometheus_stats(totals))
+        else:
+            json.dump(stats_rows(totals), f, indent=2)
+            f.write("\n")
+
+def show_stats():
+    """Print per-action timing and query totals, optionally dumping them to a file"""
+    rows = stats_rows(stats_snapshot())
+    print("\n" + "="*106)
+    print("📈 PERFORMANCE STATS")
+    print("="*106)
+    if not rows:
+        print("📭 Nothing recorded yet")
+        return
+    print(f"{'Action':<28} {'Calls':>6} {'Total ms':>11} {'Avg ms':>9} {'Max ms':>9} {'Input ms':>10} "
+          f"{'Queries':>8} {'Rows':>9} {'Bytes':>10}")
+    print("-"*106)
+    for row in rows:
+        print(f"{row['action']:<28} {row['calls']:>6} {row['total_ms']:>11,.1f} {row['avg_ms']:>9,.1f} "
+              f"{row['max_ms']:>9,.1f} {row['input_ms']:>10,.1f} {row['queries']:>8,} {row['rows']:>9,} {row['bytes']:>10,}")
+    
+    fmt = prompt("\nDump to file? (json/prometheus, Enter to skip): ").strip().lower()
+    if fmt in ("json", "prometheus"):
+        path = prompt("File path: ").strip() or f"expense_stats.{'prom' if fmt == 'prometheus' else 'json'}"
+        try:
+            dump_stats(path, fmt)
+            print(f"✅ Stats written to {path}")
+        except OSError as e:
+            print(f"❌ Could not write stats: {e}")
+
+# ============================================================================
+# SLOW QUERY LOG
+# ============================================================================
+# Statements taking at least SLOW_QUERY_MS (execute plus fetching; a negative
+# value disables the log) are written as one JSON object per line to a
+# rotating SLOW_QUERY_LOG. Parameter values are never logged, only their
+# types; reads and writes get their EXPLAIN plan attached.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "3"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+_slow_query_logger = None
+_explaining = threading.local()
+
+def get_slow_query_logger():
+    """Return the slow-query logger, attaching its rotating file handler on first use"""
+    global _slow_query_logger
+    if _slow_query_logger is None:
+        logger = logging.getLogger("expense_tracker.slow_queries")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging.handlers.RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        _slow_query_logger = logger
+    return _slow_query_logger
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals and placeholders with ? so similar statements group together"""
+    sql = re.sub(r"'(?:[^'\\]|\\.)*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    return " ".join(sql.replace("%s", "?").split())
+
+def params_shape(params, many=False):
+    """Describe parameters by type only, e.g. ['int', 'str'] or {'rows': 500, 'row': [...]}"""
+    if many:
+        return {"rows": len(params), "row": params_shape(params[0]) if params else []}
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+def log_slow_query(conn, pending):
+    """Write one slow statement, with its EXPLAIN plan when possible, to the slow-query log"""
+    if getattr(_explaining, "active", False):
+        return
+    sql = pending["sql"]
+    entry = {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "duration_ms": round(pending["seconds"] * 1000, 2),
+        "sql": normalize_sql(sql),
+        "params": params_shape(pending["params"], pending["many"]),
+        "rows_sent": pending["rows"],
+        "rows_examined": None,
+        "plan": None,
+    }
+    
+    if SLOW_QUERY_EXPLAIN and conn is not None and not pending["many"] \
+            and sql.lstrip().upper().startswith(EXPLAINABLE):
+        _explaining.active = True
+        try:
+            plan = storage.explain(conn, sql, pending["params"])
+            entry["plan"] = plan["plan"]
+            entry["rows_examined"] = plan["rows_examined"]
+        except DB_ERRORS as e:
+            entry["plan"] = f"EXPLAIN failed: {e}"
+        finally:
+            _explaining.active = False
+    
+    try:
+        get_slow_query_logger().info(json.dumps(entry, default=str))
+    except OSError:
+        pass
+
+# ============================================================================
+# DATA ACCESS
+# ============================================================================
+# Hot write statements run through server-side prepared statements. Each
+# physical connection keeps one prepared cursor per statement, so a statement
+# is parsed once per connection instead of on every call.
+SQL_INSERT_EXPENSE = (
+    "INSERT INTO expenses (user_id, date, category, amount, description, category_id) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+SQL_UPDATE_EXPENSE = (
+    "UPDATE expenses SET date=%s, category=%s, amount=%s, description=%s, category_id=%s "
+    "WHERE id=%s AND user_id=%s"
+)
+SQL_DELETE_EXPENSE = "DELETE FROM expenses WHERE id=%s AND user_id=%s"
+SQL_INSERT_INCOME = "INSERT INTO income (user_id, date, amount, description) VALUES (%s, %s, %s, %s)"
+SQL_UPDATE_INCOME = "UPDATE income SET date=%s, amount=%s, description=%s WHERE id=%s AND user_id=%s"
+SQL_DELETE_INCOME = "DELETE FROM income WHERE id=%s AND user_id=%s"
+SQL_UPSERT_ROLLUP = (
+    "INSERT INTO monthly_rollups (user_id, kind, month, category, total, count) "
+    "VALUES (%s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE total = total + VALUES(total), count = count + VALUES(count)"
+)
+SQL_BUMP_DATA_VERSION = "UPDATE users SET data_version = data_version + 1 WHERE id=%s"
+SQL_PRUNE_ROLLUP = (
+    "DELETE FROM monthly_rollups "
+    "WHERE user_id=%s AND kind=%s AND month=%s AND category=%s AND count <= 0"
+)
+SQL_INSERT_CATEGORY = "INSERT IGNORE INTO categories (name, name_key) VALUES (%s, %s)"
+
+# SQLite spellings of the statements whose MySQL syntax it does not accept;
+# everything else only needs its placeholders rewritten (see sqlite_sql).
+# SQLite keeps NUMERIC money as binary floats, so running totals are rounded
+# back to cents on every update instead of drifting (ten 0.1s give 1.0).
+SQLITE_STATEMENTS = {
+    SQL_UPSERT_ROLLUP: (
+        "INSERT INTO monthly_rollups (user_id, kind, month, category, total, count) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (user_id, kind, month, category) "
+        "DO UPDATE SET total = ROUND(total + excluded.total, 2), count = count + excluded.count"
+    ),
+    SQL_INSERT_CATEGORY: "INSERT OR IGNORE INTO categories (name, name_key) VALUES (?, ?)",
+}
+
+@lru_cache(maxsize=512)
+def sqlite_sql(sql):
+    """Translate a MySQL statement used by the app into SQLite syntax"""
+    if sql in SQLITE_STATEMENTS:
+        return SQLITE_STATEMENTS[sql]
+    return sql.replace("%s", "?").replace(" AS SIGNED)", " AS INTEGER)").replace("SUBSTRING(", "substr(")
+
+def prepared_cursor(conn, sql):
+    """Return the cached prepared cursor for sql on conn's physical connection
+    
+    The cache lives on the connection itself: the cursors reference their
+    connection, so a cache keyed by connection would keep every one alive.
+    It is tagged with the server session id because the pool reconnects
+    dropped connections in place, and the server has then freed every
+    statement prepared in the old session.
+    """
+    raw = getattr(conn, "_cnx", conn)  # pooled connections wrap the real one
+    session = getattr(raw, "connection_id", None)
+    cached = getattr(raw, "prepared_statements", None)
+    if cached is None or cached[0] != session:
+        cached = raw.prepared_statements = (session, {})
+    statements = cached[1]
+    cursor = statements.get(sql)
+    if cursor is None:
+        cursor = instrument(raw.cursor(prepared=True), raw)
+        statements[sql] = cursor
+    return cursor
+
+def execute_write(conn, sql, params):
+    """Execute a cached INSERT/UPDATE/DELETE and return the affected row count"""
+    cursor = prepared_cursor(conn, sql)
+    cursor.execute(sql, params)
+    return cursor.rowcount
+
+def fetch_one(conn, sql, params=None):
+    """Run a query and return its first row (or None)"""
+    cursor = conn.cursor(buffered=True)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+def fetch_all(conn, sql, params=None):
+    """Run a query and return all of its rows"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
 # ============================================================================
 # DATABASE SETUP
 # ============================================================================
 def create_tables(conn):
-    """Create all required database tables"""
+    """Create the users, expenses and income tables"""
     cursor = conn.cursor()
     
     try:
@@ -98,15 +827,245 @@ def create_tables(conn):
         conn.commit()
         print("✅ Database tables created successfully")
         
-    except mysql.connector.Error as e:
-        print(f"❌ Error creating tables: {e}")
-        sys.exit(1)
     finally:
         cursor.close()
 
+def create_rollup_table(conn):
+    """Create monthly_rollups and backfill it from the existing rows"""
+    cursor = conn.cursor()
+    
+    try:
+        # Income rows use an empty category
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_rollups (
+            user_id INT NOT NULL,
+            kind ENUM('expense', 'income') NOT NULL,
+            month CHAR(7) NOT NULL,
+            category VARCHAR(50) NOT NULL DEFAULT '',
+            total DECIMAL(14,2) NOT NULL DEFAULT 0,
+            count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, kind, month, category),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """)
+        recompute_rollups(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+
+def create_sqlite_schema(conn):
+    """Create the whole current schema in a SQLite database (equivalent to MySQL migrations 1-7)"""
+    # AUTOINCREMENT, like MySQL's AUTO_INCREMENT, never hands out the id of a
+    # deleted row again, so a stale or retried delete by id cannot hit a new record
+    cursor = conn.cursor()
+    try:
+        cursor.executescript("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            monthly_budget NUMERIC DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            data_version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            name_key TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            date DATE NOT NULL,
+            category TEXT NOT NULL,
+            amount NUMERIC NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            category_id INTEGER NOT NULL REFERENCES categories(id)
+        );
+        CREATE TABLE IF NOT EXISTS income (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            date DATE NOT NULL,
+            amount NUMERIC NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS monthly_rollups (
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            kind TEXT NOT NULL CHECK (kind IN ('expense', 'income')),
+            month TEXT NOT NULL,
+            category TEXT NOT NULL DEFAULT '',
+            total NUMERIC NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, kind, month, category)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS ai_insights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            created_at DATETIME NOT NULL,
+            model TEXT NOT NULL,
+            status TEXT NOT NULL CHECK (status IN ('ok', 'error')),
+            insights TEXT,
+            error TEXT,
+            prompt_tokens INTEGER NOT NULL DEFAULT 0,
+            latency_ms INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_ai_insights_user_created ON ai_insights (user_id, created_at);
+        """)
+        for table, name, columns in INDEXES + CATEGORY_INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        conn.commit()
+    finally:
+        cursor.close()
+
+# ============================================================================
+# INDEXES
+# ============================================================================
+# (table, index name, columns) for the user/date/category access patterns
+INDEXES = [
+    ("expenses", "idx_expenses_user_date", "user_id, date, id"),
+    ("expenses", "idx_expenses_user_category", "user_id, category, date"),
+    ("income", "idx_income_user_date", "user_id, date, id"),
+]
+
+# Created by the categories migration, once expenses.category_id exists
+CATEGORY_INDEXES = [
+    ("expenses", "idx_expenses_user_category_id", "user_id, category_id, date"),
+]
+
+# (description, query, indexes that should serve it)
+# (description, query, parameters after user_id, expected indexes, required
+# access type or None). Keyset pages must be "range" scans: with only the
+# user_id bound a deep page walks every newer row first.
+PROBE_ANCHOR = (date(2000, 1, 1), 1)
+
+HOT_QUERIES = [
+    (
+        "View expenses (page)",
+        "SELECT id, date, category, amount, description FROM expenses "
+        "WHERE user_id=%s ORDER BY date DESC, id DESC LIMIT 21",
+        (),
+        ("idx_expenses_user_date",),
+        None,
+    ),
+    (
+        "View expenses (anchor)",
+        "SELECT id, date, category, amount, description FROM expenses WHERE user_id=%s AND date <= %s "
+        "AND (date < %s OR (date = %s AND id <= %s)) ORDER BY date DESC, id DESC LIMIT 21",
+        (PROBE_ANCHOR[0], PROBE_ANCHOR[0], PROBE_ANCHOR[0], PROBE_ANCHOR[1]),
+        ("idx_expenses_user_date",),
+        "range",
+    ),
+    (
+        "View income (page)",
+        "SELECT id, date, amount, description FROM income "
+        "WHERE user_id=%s ORDER BY date DESC, id DESC LIMIT 21",
+        (),
+        ("idx_income_user_date",),
+        None,
+    ),
+    (
+        "Expenses by category",
+        "SELECT category_id, SUM(amount) FROM expenses WHERE user_id=%s GROUP BY category_id",
+        (),
+        ("idx_expenses_user_category_id",),
+        None,
+    ),
+    (
+        "Expense total",
+        "SELECT SUM(amount) FROM expenses WHERE user_id=%s",
+        (),
+        ("idx_expenses_user_date", "idx_expenses_user_category", "idx_expenses_user_category_id"),
+        None,
+    ),
+    (
+        "Income total",
+        "SELECT SUM(amount) FROM income WHERE user_id=%s",
+        (),
+        ("idx_income_user_date",),
+        None,
+    ),
+]
+
+def ensure_indexes(conn, indexes=None):
+    """Create any missing access-pattern indexes (idempotent)"""
+    existing = set(fetch_all(
+        conn,
+        """SELECT DISTINCT table_name, index_name FROM information_schema.statistics
+           WHERE table_schema = DATABASE()"""
+    ))
+    cursor = conn.cursor()
+    
+    try:
+        for table, name, columns in indexes or INDEXES:
+            if (table, name) in existing:
+                continue
+            # Online DDL keeps the table writable while a large index builds
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({columns}) ALGORITHM=INPLACE LOCK=NONE")
+            print(f"✅ Created index {name} on {table}")
+    finally:
+        cursor.close()
+
+def check_indexes(conn, user_id):
+    """EXPLAIN the hot queries and report whether they use the expected indexes"""
+    print("\n" + "="*80)
+    print("🔍 INDEX USAGE CHECK")
+    print("="*80)
+    print(f"{'Query':<24} {'Index used':<28} {'Type':<7} {'Rows':<8} Status")
+    print("="*80)
+    
+    all_ok = True
+    try:
+        for description, query, params, expected, access_type in HOT_QUERIES:
+            plan = storage.explain(conn, query, (user_id,) + params)
+            key = plan["key"] or "-"
+            extra = plan["extra"]
+            
+            if plan["key"] in expected and access_type in (None, plan["type"]):
+                status = "✅ OK"
+            elif plan["key"] in expected:
+                status = f"⚠️  not a {access_type} scan"
+                all_ok = False
+            elif plan["key"]:
+                status = "⚠️  other index"
+                all_ok = False
+            else:
+                status = "❌ full scan"
+                all_ok = False
+            if "filesort" in extra:
+                status += " (filesort)"
+            
+            print(f"{description:<24} {key:<28} {str(plan['type']):<7} {str(plan['rows']):<8} {status}")
+    except DB_ERRORS as e:
+        print(f"❌ Error running EXPLAIN: {e}")
+        all_ok = False
+    
+    print("="*80)
+    if all_ok:
+        print("✅ All hot queries are served by their indexes")
+    else:
+        print("⚠️  Some queries are not using the expected indexes (check schema_version or run ANALYZE TABLE)")
+    return all_ok
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
+MAX_AMOUNT = 99_999_999.99  # largest DECIMAL(10,2) value
+
+def parse_amount(value):
+    """Return value as a float amount; raises ValueError unless it is positive, finite and has at most 2 decimals"""
+    amount = float(value)
+    if not math.isfinite(amount):
+        raise ValueError("Amount must be a number!")
+    if amount <= 0:
+        raise ValueError("Amount must be positive!")
+    if amount > MAX_AMOUNT:
+        raise ValueError(f"Amount must not exceed {MAX_AMOUNT:,.2f}!")
+    if round(amount, 2) != amount:
+        raise ValueError("Amount can have at most 2 decimal places!")
+    return amount
+
 def hash_password(password):
     """Hash password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -116,6 +1075,112 @@ def clear_screen():
     import os
     os.system('cls' if os.name == 'nt' else 'clear')
 
+# ============================================================================
+# PAGINATED VIEWER
+# ============================================================================
+# Pages are addressed by a keyset anchor (date, id): a page holds the rows at or
+# older than its anchor, so fetching any page costs the same no matter how deep
+# into the history it is.
+MAX_ROW_ID = 2**31 - 1  # largest INT id, anchors a jump to "end of that day"
+
+def fetch_page(conn, table, columns, user_id, anchor=None, page_size=None):
+    """Stream up to page_size + 1 rows at or older than anchor, newest first.
+    
+    `columns` must start with "id, date". The extra row is the anchor of the
+    next page. Rows are yielded straight from an unbuffered cursor.
+    """
+    page_size = page_size or PAGE_SIZE
+    cursor = conn.cursor(buffered=False)
+    try:
+        if anchor is None:
+            cursor.execute(
+                f"SELECT {columns} FROM {table} WHERE user_id=%s "
+                "ORDER BY date DESC, id DESC LIMIT %s",
+                (user_id, page_size + 1)
+            )
+        else:
+            cursor.execute(
+                # The redundant date bound gives the index a range to seek to
+                f"SELECT {columns} FROM {table} WHERE user_id=%s AND date <= %s "
+                "AND (date < %s OR (date = %s AND id <= %s)) "
+                "ORDER BY date DESC, id DESC LIMIT %s",
+                (user_id, anchor[0], anchor[0], anchor[0], anchor[1], page_size + 1)
+            )
+        for row in cursor:
+            yield row
+    finally:
+        # An unbuffered cursor must be drained before the connection is reused
+        if conn.unread_result:
+            cursor.fetchall()
+        cursor.close()
+
+def find_previous_anchor(conn, table, user_id, first_key, page_size=None):
+    """Return the anchor of the page just newer than first_key (None if there is none)"""
+    page_size = page_size or PAGE_SIZE
+    rows = fetch_all(
+        conn,
+        f"SELECT date, id FROM {table} WHERE user_id=%s AND date >= %s "
+        "AND (date > %s OR (date = %s AND id > %s)) "
+        "ORDER BY date ASC, id ASC LIMIT %s",
+        (user_id, first_key[0], first_key[0], first_key[0], first_key[1], page_size)
+    )
+    return (rows[-1][0], rows[-1][1]) if rows else None
+
+def browse_records(conn, user_id, table, columns, header, width, print_row, empty_message):
+    """Interactive pager with next / previous / jump-to-date navigation"""
+    anchor = None
+    
+    while True:
+        first_key = None
+        next_anchor = None
+        count = 0
+        
+        for row in fetch_page(conn, table, columns, user_id, anchor):
+            if count == PAGE_SIZE:
+                next_anchor = (row[1], row[0])
+                break
+            if count == 0:
+                print("\n" + "="*width)
+                print(header)
+                print("="*width)
+                first_key = (row[1], row[0])
+            print_row(row)
+            count += 1
+        
+        if count == 0:
+            if anchor is None:
+                print(empty_message)
+                return
+            print("\n📭 No records on or before that date")
+        else:
+            print("="*width)
+            more = " (more available)" if next_anchor else ""
+            print(f"Showing {count} record(s){more}")
+        
+        choice = prompt("[N]ext (Enter)  [P]revious  [J]ump to date  [Q]uit: ").strip().lower()
+        
+        if choice in ("", "n"):
+            if next_anchor is None:
+                return
+            anchor = next_anchor
+        elif choice == "p":
+            previous = find_previous_anchor(conn, table, user_id, first_key or anchor)
+            if previous is None:
+                print("ℹ️  Already at the newest records")
+            else:
+                anchor = previous
+        elif choice == "j":
+            jump_date = prompt("Jump to date (YYYY-MM-DD): ").strip()
+            try:
+                datetime.strptime(jump_date, "%Y-%m-%d")
+                anchor = (jump_date, MAX_ROW_ID)
+            except ValueError:
+                print("❌ Invalid date format!")
+        elif choice == "q":
+            return
+        else:
+            print("❌ Invalid choice")
+
 # ============================================================================
 # USER AUTHENTICATION
 # ============================================================================
@@ -127,9 +1192,9 @@ def signup(conn):
     print("📝 USER REGISTRATION")
     print("="*50)
     
-    username = input("Enter username: ").strip()
-    password = input("Enter password: ").strip()
-    confirm_password = input("Confirm password: ").strip()
+    username = prompt("Enter username: ").strip()
+    password = prompt("Enter password: ").strip()
+    confirm_password = prompt("Confirm password: ").strip()
     
     # Validation
     if password != confirm_password:
@@ -143,7 +1208,7 @@ def signup(conn):
         return
     
     try:
-        monthly_budget = float(input("Enter monthly budget: "))
+        monthly_budget = float(prompt("Enter monthly budget: "))
         if monthly_budget <= 0:
             print("❌ Budget must be positive!")
             cursor.close()
@@ -162,52 +1227,127 @@ def signup(conn):
         )
         conn.commit()
         print(f"✅ User '{username}' created successfully!")
-    except mysql.connector.IntegrityError:
+    except DB_INTEGRITY_ERRORS:
         print("❌ Username already exists!")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
         print(f"❌ Error: {e}")
     finally:
         cursor.close()
 
 def login(conn):
     """Handle user login and return user_id and monthly_budget"""
-    cursor = conn.cursor()
-    
     print("\n" + "="*50)
     print("🔐 USER LOGIN")
     print("="*50)
     
-    username = input("Username: ").strip()
-    password = input("Password: ").strip()
-    hashed_pw = hash_password(password)
-    
-    cursor.execute(
-        "SELECT id, monthly_budget FROM users WHERE username=%s AND password=%s",
-        (username, hashed_pw)
-    )
-    result = cursor.fetchone()
-    cursor.close()
+    username = prompt("Username: ").strip()
+    password = prompt("Password: ").strip()
+    user_id, monthly_budget = authenticate(conn, username, password)
     
-    if result:
+    if user_id is not None:
         print(f"✅ Welcome back, {username}!")
-        return result[0], result[1]  # user_id, monthly_budget
     else:
         print("❌ Invalid username or password!")
-        return None, None
+    return user_id, monthly_budget
+
+def authenticate(conn, username, password):
+    """Return (user_id, monthly_budget) for valid credentials, else (None, None)"""
+    result = fetch_one(
+        conn,
+        "SELECT id, monthly_budget FROM users WHERE username=%s AND password=%s",
+        (username, hash_password(password))
+    )
+    return (result[0], result[1]) if result else (None, None)
+
+# ============================================================================
+# CATEGORIES
+# ============================================================================
+# Category names are matched on a case- and whitespace-insensitive key
+# ("food ", "FOOD" and "Food" are one category) and stored once in the
+# categories table under the first spelling seen, so "ATM" stays "ATM".
+# expenses keeps that name next to the integer category_id so listings and
+# exports need no join.
+_categories = {}
+
+def canonical_category(name):
+    """Return a category name trimmed and single-spaced"""
+    return " ".join(str(name).split())[:50]
+
+def category_key(name):
+    """Return the key category names are matched on (single-spaced, casefolded)"""
+    return " ".join(str(name).split()).casefold()[:50]
+
+def resolve_category(conn, name):
+    """Return (id, stored name) of the category matching name, creating it if needed"""
+    key = category_key(name)
+    cached = _categories.get(key)
+    if cached is not None:
+        return cached
+    
+    row = fetch_one(conn, "SELECT id, name FROM categories WHERE name_key=%s", (key,))
+    if row is None:
+        # Not cached: the new row disappears if the caller rolls back
+        execute_write(conn, SQL_INSERT_CATEGORY, (canonical_category(name), key))
+        return tuple(fetch_one(conn, "SELECT id, name FROM categories WHERE name_key=%s", (key,)))
+    _categories[key] = tuple(row)
+    return _categories[key]
+
+def add_categories(conn):
+    """Add the categories table and expenses.category_id, merging spellings of the same category"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(50) NOT NULL,
+            name_key VARCHAR(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL UNIQUE
+        )
+        """)
+        column = fetch_one(
+            conn,
+            """SELECT is_nullable FROM information_schema.columns
+               WHERE table_schema = DATABASE() AND table_name = 'expenses' AND column_name = 'category_id'"""
+        )
+        if column is None:
+            cursor.execute("ALTER TABLE expenses ADD COLUMN category_id INT NULL")
+        
+        if column is None or column[0] == "YES":
+            # Oldest spelling first, so each category keeps the first one used
+            for (name,) in fetch_all(
+                conn,
+                "SELECT category FROM expenses WHERE category_id IS NULL GROUP BY category ORDER BY MIN(id)"
+            ):
+                category_id, stored = resolve_category(conn, canonical_category(name) or "Other")
+                cursor.execute(
+                    "UPDATE expenses SET category=%s, category_id=%s WHERE category=%s AND category_id IS NULL",
+                    (stored, category_id, name)
+                )
+            conn.commit()
+            cursor.execute("""
+            ALTER TABLE expenses
+                MODIFY category_id INT NOT NULL,
+                ADD CONSTRAINT fk_expenses_category FOREIGN KEY (category_id) REFERENCES categories(id)
+            """)
+        
+        # Merged spellings change rollups and every cached chart
+        recompute_rollups(cursor)
+        cursor.execute("UPDATE users SET data_version = data_version + 1")
+        conn.commit()
+    finally:
+        cursor.close()
+    ensure_indexes(conn, CATEGORY_INDEXES)
 
 # ============================================================================
 # EXPENSE MANAGEMENT
 # ============================================================================
 def add_expense(conn, user_id):
     """Add a new expense"""
-    cursor = conn.cursor()
-    
     try:
         print("\n" + "="*50)
         print("➕ ADD EXPENSE")
         print("="*50)
         
-        date_input = input("Date (YYYY-MM-DD) or press Enter for today: ").strip()
+        date_input = prompt("Date (YYYY-MM-DD) or press Enter for today: ").strip()
         if not date_input:
             date = datetime.now().strftime("%Y-%m-%d")
         else:
@@ -215,64 +1355,77 @@ def add_expense(conn, user_id):
             datetime.strptime(date_input, "%Y-%m-%d")
             date = date_input
         
-        category = input("Category (Food/Transport/Shopping/Bills/Entertainment/Other): ").strip()
-        amount = float(input("Amount: "))
-        description = input("Description: ").strip()
-        
-        if amount <= 0:
-            print("❌ Amount must be positive!")
-            return
+        category = prompt("Category (Food/Transport/Shopping/Bills/Entertainment/Other): ").strip()
+        amount = parse_amount(prompt("Amount: "))
+        description = prompt("Description: ").strip()
         
-        cursor.execute(
-            "INSERT INTO expenses (user_id, date, category, amount, description) VALUES (%s, %s, %s, %s, %s)",
-            (user_id, date, category, amount, description)
-        )
-        conn.commit()
+        insert_expense(conn, user_id, date, category, amount, description)
         print("✅ Expense added successfully!")
         
     except ValueError as e:
         print(f"❌ Invalid input: {e}")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
+        conn.rollback()
         print(f"❌ Database error: {e}")
-    finally:
-        cursor.close()
 
-def view_expenses(conn, user_id):
-    """Display all expenses for the user"""
-    cursor = conn.cursor()
+def insert_expense(conn, user_id, date, category, amount, description, commit=True):
+    """Validate and store one expense with its rollup; raises ValueError on bad input"""
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    datetime.strptime(str(date), "%Y-%m-%d")
+    amount = parse_amount(amount)
+    category = canonical_category(category or "")
+    if not category:
+        raise ValueError("Category is required!")
+    category_id, category = resolve_category(conn, category)
     
-    cursor.execute(
-        "SELECT id, date, category, amount, description FROM expenses WHERE user_id=%s ORDER BY date DESC",
-        (user_id,)
+    execute_write(
+        conn, SQL_INSERT_EXPENSE,
+        (user_id, date, category, amount, description, category_id)
     )
-    expenses = cursor.fetchall()
-    cursor.close()
-    
-    if not expenses:
-        print("\n📭 No expenses found")
-        return
-    
-    print("\n" + "="*80)
-    print(f"{'ID':<5} {'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<30}")
-    print("="*80)
-    for exp in expenses:
+    apply_rollup(conn, user_id, "expense", date, category, amount, 1)
+    bump_data_version(conn, user_id)
+    if commit:
+        conn.commit()
+
+def remove_expense(conn, user_id, exp_id):
+    """Delete one of the user's expenses with its rollup; returns False if it was not found"""
+    expense = fetch_one(
+        conn,
+        "SELECT date, category, amount FROM expenses WHERE id=%s AND user_id=%s",
+        (exp_id, user_id)
+    )
+    if not expense:
+        return False
+    
+    execute_write(conn, SQL_DELETE_EXPENSE, (exp_id, user_id))
+    apply_rollup(conn, user_id, "expense", expense[0], expense[1], -expense[2], -1)
+    bump_data_version(conn, user_id)
+    conn.commit()
+    return True
+
+def view_expenses(conn, user_id):
+    """Browse the user's expenses page by page, newest first"""
+    def print_row(exp):
         print(f"{exp[0]:<5} {str(exp[1]):<12} {exp[2]:<15} ₹{exp[3]:<9.2f} {exp[4]:<30}")
-    print("="*80)
+    
+    browse_records(
+        conn, user_id, "expenses", "id, date, category, amount, description",
+        f"{'ID':<5} {'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<30}",
+        80, print_row, "\n📭 No expenses found"
+    )
 
 def edit_expense(conn, user_id):
     """Edit an existing expense"""
-    cursor = conn.cursor()
-    
     view_expenses(conn, user_id)
     
     try:
-        exp_id = int(input("\nEnter Expense ID to edit: "))
+        exp_id = int(prompt("\nEnter Expense ID to edit: "))
         
-        cursor.execute(
+        expense = fetch_one(
+            conn,
             "SELECT * FROM expenses WHERE id=%s AND user_id=%s",
             (exp_id, user_id)
         )
-        expense = cursor.fetchone()
         
         if not expense:
             print("❌ Expense not found or doesn't belong to you!")
@@ -282,157 +1435,180 @@ def edit_expense(conn, user_id):
         print("Press Enter to keep current value\n")
         
         # Get new values
-        new_date = input(f"New Date (current: {expense[2]}): ").strip()
+        new_date = prompt(f"New Date (current: {expense[2]}): ").strip()
         if new_date:
             datetime.strptime(new_date, "%Y-%m-%d")  
         else:
             new_date = expense[2]
         
-        new_category = input(f"New Category (current: {expense[3]}): ").strip()
-        new_category = new_category if new_category else expense[3]
+        new_category = prompt(f"New Category (current: {expense[3]}): ").strip()
+        new_category = canonical_category(new_category) if new_category else expense[3]
         
-        new_amount = input(f"New Amount (current: {expense[4]}): ").strip()
+        new_amount = prompt(f"New Amount (current: {expense[4]}): ").strip()
         if new_amount:
-            new_amount = float(new_amount)
-            if new_amount <= 0:
-                print("❌ Amount must be positive!")
-                return
+            new_amount = parse_amount(new_amount)
         else:
             new_amount = expense[4]
         
-        new_description = input(f"New Description (current: {expense[5]}): ").strip()
+        new_description = prompt(f"New Description (current: {expense[5]}): ").strip()
         new_description = new_description if new_description else expense[5]
         
-        cursor.execute(
-            """UPDATE expenses 
-               SET date=%s, category=%s, amount=%s, description=%s 
-               WHERE id=%s AND user_id=%s""",
-            (new_date, new_category, new_amount, new_description, exp_id, user_id)
-        )
-        conn.commit()
+        update_expense(conn, user_id, exp_id, new_date, new_category, new_amount, new_description)
         print("✅ Expense updated successfully!")
         
     except ValueError as e:
         print(f"❌ Invalid input: {e}")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
+        conn.rollback()
         print(f"❌ Database error: {e}")
-    finally:
-        cursor.close()
+
+def update_expense(conn, user_id, exp_id, date=None, category=None, amount=None, description=None):
+    """Change the given fields of one of the user's expenses and move its rollup
+    
+    Fields left as None (or empty) keep their current value. Returns False if
+    the expense was not found; raises ValueError on bad input.
+    """
+    expense = fetch_one(
+        conn,
+        "SELECT date, category, amount, description FROM expenses WHERE id=%s AND user_id=%s",
+        (exp_id, user_id)
+    )
+    if not expense:
+        return False
+    
+    if date:
+        datetime.strptime(str(date), "%Y-%m-%d")
+    else:
+        date = expense[0]
+    category = canonical_category(category) if category else expense[1]
+    if amount in (None, ""):
+        amount = expense[2]
+    else:
+        amount = parse_amount(amount)
+    description = description if description else expense[3]
+    category_id, category = resolve_category(conn, category)
+    
+    execute_write(
+        conn, SQL_UPDATE_EXPENSE,
+        (date, category, amount, description, category_id, exp_id, user_id)
+    )
+    apply_rollup(conn, user_id, "expense", expense[0], expense[1], -expense[2], -1)
+    apply_rollup(conn, user_id, "expense", date, category, amount, 1)
+    bump_data_version(conn, user_id)
+    conn.commit()
+    return True
 
 def delete_expense(conn, user_id):
     """Delete an expense"""
-    cursor = conn.cursor()
-    
     view_expenses(conn, user_id)
     
     try:
-        exp_id = int(input("\nEnter Expense ID to delete: "))
+        exp_id = int(prompt("\nEnter Expense ID to delete: "))
         
-        cursor.execute(
+        expense = fetch_one(
+            conn,
             "SELECT * FROM expenses WHERE id=%s AND user_id=%s",
             (exp_id, user_id)
         )
-        expense = cursor.fetchone()
         
         if not expense:
             print("❌ Expense not found or doesn't belong to you!")
             return
         
-        confirm = input(f"Delete expense: {expense[3]} - ₹{expense[4]} - {expense[5]}? (yes/no): ").strip().lower()
+        confirm = prompt(f"Delete expense: {expense[3]} - ₹{expense[4]} - {expense[5]}? (yes/no): ").strip().lower()
         
         if confirm == 'yes':
-            cursor.execute(
-                "DELETE FROM expenses WHERE id=%s AND user_id=%s",
-                (exp_id, user_id)
-            )
-            conn.commit()
+            remove_expense(conn, user_id, exp_id)
             print("✅ Expense deleted successfully!")
         else:
             print("❌ Deletion cancelled")
             
     except ValueError as e:
         print(f"❌ Invalid input: {e}")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
+        conn.rollback()
         print(f"❌ Database error: {e}")
-    finally:
-        cursor.close()
 
 # ============================================================================
 # INCOME MANAGEMENT
 # ============================================================================
 def add_income(conn, user_id):
     """Add a new income record"""
-    cursor = conn.cursor()
-    
     try:
         print("\n" + "="*50)
         print("➕ ADD INCOME")
         print("="*50)
         
-        date_input = input("Date (YYYY-MM-DD) or press Enter for today: ").strip()
+        date_input = prompt("Date (YYYY-MM-DD) or press Enter for today: ").strip()
         if not date_input:
             date = datetime.now().strftime("%Y-%m-%d")
         else:
             datetime.strptime(date_input, "%Y-%m-%d")
             date = date_input
         
-        amount = float(input("Income Amount: "))
-        description = input("Description: ").strip()
-        
-        if amount <= 0:
-            print("❌ Amount must be positive!")
-            return
+        amount = parse_amount(prompt("Income Amount: "))
+        description = prompt("Description: ").strip()
         
-        cursor.execute(
-            "INSERT INTO income (user_id, date, amount, description) VALUES (%s, %s, %s, %s)",
-            (user_id, date, amount, description)
-        )
-        conn.commit()
+        insert_income(conn, user_id, date, amount, description)
         print("✅ Income added successfully!")
         
     except ValueError as e:
         print(f"❌ Invalid input: {e}")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
+        conn.rollback()
         print(f"❌ Database error: {e}")
-    finally:
-        cursor.close()
 
-def view_income(conn, user_id):
-    """Display all income records"""
-    cursor = conn.cursor()
+def insert_income(conn, user_id, date, amount, description, commit=True):
+    """Validate and store one income record with its rollup; raises ValueError on bad input"""
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    datetime.strptime(str(date), "%Y-%m-%d")
+    amount = parse_amount(amount)
     
-    cursor.execute(
-        "SELECT id, date, amount, description FROM income WHERE user_id=%s ORDER BY date DESC",
-        (user_id,)
+    execute_write(conn, SQL_INSERT_INCOME, (user_id, date, amount, description))
+    apply_rollup(conn, user_id, "income", date, "", amount, 1)
+    bump_data_version(conn, user_id)
+    if commit:
+        conn.commit()
+
+def remove_income(conn, user_id, inc_id):
+    """Delete one of the user's income records with its rollup; returns False if it was not found"""
+    income = fetch_one(
+        conn,
+        "SELECT date, amount FROM income WHERE id=%s AND user_id=%s",
+        (inc_id, user_id)
     )
-    incomes = cursor.fetchall()
-    cursor.close()
-    
-    if not incomes:
-        print("\n📭 No income records found")
-        return
+    if not income:
+        return False
     
-    print("\n" + "="*70)
-    print(f"{'ID':<5} {'Date':<12} {'Amount':<10} {'Description':<30}")
-    print("="*70)
-    for inc in incomes:
+    execute_write(conn, SQL_DELETE_INCOME, (inc_id, user_id))
+    apply_rollup(conn, user_id, "income", income[0], "", -income[1], -1)
+    bump_data_version(conn, user_id)
+    conn.commit()
+    return True
+
+def view_income(conn, user_id):
+    """Browse the user's income records page by page, newest first"""
+    def print_row(inc):
         print(f"{inc[0]:<5} {str(inc[1]):<12} ₹{inc[2]:<9.2f} {inc[3]:<30}")
-    print("="*70)
+    
+    browse_records(
+        conn, user_id, "income", "id, date, amount, description",
+        f"{'ID':<5} {'Date':<12} {'Amount':<10} {'Description':<30}",
+        70, print_row, "\n📭 No income records found"
+    )
 
 def edit_income(conn, user_id):
     """Edit an existing income record"""
-    cursor = conn.cursor()
-    
     view_income(conn, user_id)
     
     try:
-        inc_id = int(input("\nEnter Income ID to edit: "))
+        inc_id = int(prompt("\nEnter Income ID to edit: "))
         
-        cursor.execute(
+        income = fetch_one(
+            conn,
             "SELECT * FROM income WHERE id=%s AND user_id=%s",
             (inc_id, user_id)
         )
-        income = cursor.fetchone()
         
         if not income:
             print("❌ Income not found or doesn't belong to you!")
@@ -441,294 +1617,2291 @@ def edit_income(conn, user_id):
         print(f"\nCurrent: Date={income[2]}, Amount=₹{income[3]}, Description={income[4]}")
         print("Press Enter to keep current value\n")
         
-        new_date = input(f"New Date (current: {income[2]}): ").strip()
+        new_date = prompt(f"New Date (current: {income[2]}): ").strip()
         if new_date:
             datetime.strptime(new_date, "%Y-%m-%d")
         else:
             new_date = income[2]
         
-        new_amount = input(f"New Amount (current: {income[3]}): ").strip()
+        new_amount = prompt(f"New Amount (current: {income[3]}): ").strip()
         if new_amount:
-            new_amount = float(new_amount)
-            if new_amount <= 0:
-                print("❌ Amount must be positive!")
-                return
+            new_amount = parse_amount(new_amount)
         else:
             new_amount = income[3]
         
-        new_description = input(f"New Description (current: {income[4]}): ").strip()
+        new_description = prompt(f"New Description (current: {income[4]}): ").strip()
         new_description = new_description if new_description else income[4]
         
-        cursor.execute(
-            """UPDATE income 
-               SET date=%s, amount=%s, description=%s 
-               WHERE id=%s AND user_id=%s""",
-            (new_date, new_amount, new_description, inc_id, user_id)
-        )
-        conn.commit()
+        update_income(conn, user_id, inc_id, new_date, new_amount, new_description)
         print("✅ Income updated successfully!")
         
     except ValueError as e:
         print(f"❌ Invalid input: {e}")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
+        conn.rollback()
         print(f"❌ Database error: {e}")
-    finally:
-        cursor.close()
+
+def update_income(conn, user_id, inc_id, date=None, amount=None, description=None):
+    """Change the given fields of one of the user's income records and move its rollup
+    
+    Fields left as None (or empty) keep their current value. Returns False if
+    the record was not found; raises ValueError on bad input.
+    """
+    income = fetch_one(
+        conn,
+        "SELECT date, amount, description FROM income WHERE id=%s AND user_id=%s",
+        (inc_id, user_id)
+    )
+    if not income:
+        return False
+    
+    if date:
+        datetime.strptime(str(date), "%Y-%m-%d")
+    else:
+        date = income[0]
+    if amount in (None, ""):
+        amount = income[1]
+    else:
+        amount = parse_amount(amount)
+    description = description if description else income[2]
+    
+    execute_write(conn, SQL_UPDATE_INCOME, (date, amount, description, inc_id, user_id))
+    apply_rollup(conn, user_id, "income", income[0], "", -income[1], -1)
+    apply_rollup(conn, user_id, "income", date, "", amount, 1)
+    bump_data_version(conn, user_id)
+    conn.commit()
+    return True
 
 def delete_income(conn, user_id):
     """Delete an income record"""
-    cursor = conn.cursor()
-    
     view_income(conn, user_id)
     
     try:
-        inc_id = int(input("\nEnter Income ID to delete: "))
+        inc_id = int(prompt("\nEnter Income ID to delete: "))
         
-        cursor.execute(
+        income = fetch_one(
+            conn,
             "SELECT * FROM income WHERE id=%s AND user_id=%s",
             (inc_id, user_id)
         )
-        income = cursor.fetchone()
         
         if not income:
             print("❌ Income not found or doesn't belong to you!")
             return
         
-        confirm = input(f"Delete income: ₹{income[3]} - {income[4]}? (yes/no): ").strip().lower()
+        confirm = prompt(f"Delete income: ₹{income[3]} - {income[4]}? (yes/no): ").strip().lower()
         
         if confirm == 'yes':
-            cursor.execute(
-                "DELETE FROM income WHERE id=%s AND user_id=%s",
-                (inc_id, user_id)
-            )
-            conn.commit()
+            remove_income(conn, user_id, inc_id)
             print("✅ Income deleted successfully!")
         else:
             print("❌ Deletion cancelled")
             
     except ValueError as e:
         print(f"❌ Invalid input: {e}")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
+        conn.rollback()
         print(f"❌ Database error: {e}")
-    finally:
-        cursor.close()
 
 # ============================================================================
-# AI INSIGHTS USING GEMINI
+# MONTHLY ROLLUPS
 # ============================================================================
-def get_ai_insights(conn,user_id,monthly_budget):
-    expenses_df,income_df=load_user_data(conn,user_id)
-    if expenses_df.empty:
-        print("📭 No expenses found. Add some expenses first.")
-        return
-    # print("Available models:")
-    # for m in genai.list_models():
-    #     if 'generateContent' in m.supported_generation_methods:
-    #         print(f"  - {m.name}")
-    print("\n" + "="*50)
-    print("🤖 AI FINANCIAL INSIGHTS")
-    print("="*50)
-    expenses_df=expenses_df.sort_values("date",ascending=False).head(30)
-    # converting expenses into readable text for AI
-    expenses_text=""
-    for _,row in expenses_df.iterrows():
-        expenses_text+=(
-            f"Date : {row['date']},"
-            f"Category : {row['category']},"
-            f"Amount : {row['amount']},"
-            f"Description : {row['description']},"
-        )
-    # AI prompt
-    prompt = f"""
-    You are a personal finance advisor.
+# monthly_rollups holds one row per (user, kind, month, category) with the
+# running total and row count. The CRUD functions keep it in step with the raw
+# tables inside the same transaction, so analytics read a few dozen rows.
+def apply_rollup(conn, user_id, kind, date, category, amount, count):
+    """Add amount/count to the rollup bucket of date's month (negative values remove)"""
+    month = str(date)[:7]
+    execute_write(conn, SQL_UPSERT_ROLLUP, (user_id, kind, month, category, amount, count))
+    if count < 0:
+        execute_write(conn, SQL_PRUNE_ROLLUP, (user_id, kind, month, category))
 
-    Monthly budget: ₹{monthly_budget}
+def bump_data_version(conn, user_id):
+    """Mark the user's data as changed (part of the caller's transaction)"""
+    execute_write(conn, SQL_BUMP_DATA_VERSION, (user_id,))
+    frame_cache.invalidate(user_id)
 
-    Below are the user's recent expenses.
+def get_data_version(conn, user_id):
+    """Return the user's data version, which changes on every write to their data"""
+    row = fetch_one(conn, "SELECT data_version FROM users WHERE id=%s", (user_id,))
+    return row[0] if row else 0
 
-    Tasks:
-    1. Identify unnecessary or avoidable expenses.
-    2. Explain why they are unnecessary.
-    3. Suggest 3 clear ways to increase savings.
-
-    Keep the advice short, practical, and beginner-friendly.
+def recompute_rollups(cursor, user_id=None):
+    """Replace the rollup rows of one user (or everyone) with fresh aggregates"""
+    where = "WHERE user_id=%s" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else None
+    
+    cursor.execute(f"DELETE FROM monthly_rollups {where}", params)
+    cursor.execute(
+        f"""INSERT INTO monthly_rollups (user_id, kind, month, category, total, count)
+            SELECT user_id, 'expense', SUBSTRING(date, 1, 7), category, ROUND(SUM(amount), 2), COUNT(*)
+            FROM expenses {where}
+            GROUP BY user_id, SUBSTRING(date, 1, 7), category""",
+        params
+    )
+    cursor.execute(
+        f"""INSERT INTO monthly_rollups (user_id, kind, month, category, total, count)
+            SELECT user_id, 'income', SUBSTRING(date, 1, 7), '', ROUND(SUM(amount), 2), COUNT(*)
+            FROM income {where}
+            GROUP BY user_id, SUBSTRING(date, 1, 7)""",
+        params
+    )
 
-    Expenses:
-    {expenses_text}
-    """
-    #Calling Gemini
+def rebuild_rollups(conn, user_id=None):
+    """Recompute monthly_rollups from the raw tables, for one user or everyone"""
+    cursor = conn.cursor()
+    
     try:
-        model=genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
-        print("\n" + response.text)
-        print("\n" + "="*50)
-    except Exception as e:
-        print("❌ Error while calling Gemini AI")
-        print(e)
+        recompute_rollups(cursor, user_id)
+        conn.commit()
+        print("✅ Monthly rollups rebuilt")
+    except DB_ERRORS as e:
+        conn.rollback()
+        print(f"❌ Error rebuilding rollups: {e}")
+    finally:
+        cursor.close()
 
-# ============================================================================
-# ANALYTICS & REPORTING
-# ============================================================================
-def load_user_data(conn, user_id):
-    """Load user's expenses and income into pandas DataFrames"""
-    expenses = pd.read_sql(
-        "SELECT * FROM expenses WHERE user_id=%s",
+def get_category_totals(conn, user_id):
+    """Return total expense per category as a Series, largest first"""
+    rows = fetch_all(
         conn,
-        params=(user_id,)
+        """SELECT category, ROUND(SUM(total), 2) FROM monthly_rollups
+           WHERE user_id=%s AND kind='expense'
+           GROUP BY category ORDER BY SUM(total) DESC""",
+        (user_id,)
     )
-    income = pd.read_sql(
-        "SELECT * FROM income WHERE user_id=%s",
+    return pd.Series([float(r[1]) for r in rows], index=[r[0] for r in rows], dtype=float)
+
+def get_monthly_frame(conn, user_id):
+    """Return monthly expense and income totals as a DataFrame indexed by month
+    
+    One grouped query returns both kinds; pivoting aligns them on the union of
+    months with zeros where a month has only one kind.
+    """
+    rows = fetch_all(
         conn,
-        params=(user_id,)
+        """SELECT month, kind, ROUND(SUM(total), 2) FROM monthly_rollups
+           WHERE user_id=%s
+           GROUP BY month, kind""",
+        (user_id,)
+    )
+    frame = pd.DataFrame(rows, columns=["month", "kind", "total"])
+    frame["total"] = frame["total"].astype(float)
+    return (
+        frame.pivot(index="month", columns="kind", values="total")
+        .reindex(columns=["expense", "income"])
+        .fillna(0.0)
+        .sort_index()
     )
-    return expenses, income
 
-def show_summary(conn, user_id, monthly_budget):
-    """Display financial summary"""
-    expenses_df, income_df = load_user_data(conn, user_id)
+# ============================================================================
+# BULK IMPORT
+# ============================================================================
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+
+# Column layouts of the supported CSV files. "kind" says whether every row is
+# an expense, an income, or "signed" (negative = expense, positive = income).
+# Bank exports either carry one signed amount column or separate debit and
+# credit columns, usually with day-first dates.
+IMPORT_FORMATS = {
+    "expenses": {"kind": "expense", "date": "date", "date_format": "%Y-%m-%d", "amount": "amount",
+                 "category": "category", "description": "description"},
+    "income": {"kind": "income", "date": "date", "date_format": "%Y-%m-%d", "amount": "amount",
+               "description": "description"},
+    "bank-signed": {"kind": "signed", "date": "Date", "amount": "Amount",
+                    "description": "Description", "dayfirst": True},
+    "bank-debit-credit": {"kind": "signed", "date": "Date", "debit": "Debit",
+                          "credit": "Credit", "description": "Description", "dayfirst": True},
+}
+
+def parse_amounts(column):
+    """Convert a column of amount strings ("1,234.50", "") to floats, NaN when invalid"""
+    return pd.to_numeric(column.str.replace(",", "", regex=False).str.strip(), errors="coerce")
+
+def read_import_chunks(path, fmt, chunk_size):
+    """Stream a CSV file and yield (expense_rows, income_rows, rejected) per validated chunk
+    
+    Rows are (date, category, amount, description) tuples of plain Python values.
+    """
+    layout = IMPORT_FORMATS[fmt]
+    
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, skipinitialspace=True):
+        chunk.columns = chunk.columns.str.strip()
+        
+        dates = pd.to_datetime(
+            chunk[layout["date"]], errors="coerce",
+            format=layout.get("date_format"), dayfirst=layout.get("dayfirst", False)
+        )
+        # Like parse_amount, reject amounts with more than 2 decimals instead of rounding them
+        if "debit" in layout:
+            credit = parse_amounts(chunk[layout["credit"]]).fillna(0)
+            debit = parse_amounts(chunk[layout["debit"]]).fillna(0)
+            amount = credit - debit
+            precise = (credit.round(2) == credit) & (debit.round(2) == debit)
+        else:
+            amount = parse_amounts(chunk[layout["amount"]])
+            precise = amount.round(2) == amount
+        
+        if layout.get("category") in chunk:
+            category = chunk[layout["category"]].fillna("").str.split().str.join(" ").str.slice(0, 50)
+            category = category.mask(category == "", "Other")
+        else:
+            category = pd.Series("Other", index=chunk.index)
+        description = chunk[layout["description"]].fillna("").str.strip().str.slice(0, 255)
+        
+        valid = dates.notna() & np.isfinite(amount) & (amount != 0) & (amount.abs() <= MAX_AMOUNT) & precise
+        if layout["kind"] != "signed":
+            valid &= amount > 0
+        
+        if layout["kind"] == "signed":
+            is_expense = amount < 0
+        else:
+            is_expense = pd.Series(layout["kind"] == "expense", index=chunk.index)
+        
+        batches = []
+        for mask in (valid & is_expense, valid & ~is_expense):
+            batches.append(list(zip(
+                dates[mask].dt.date.tolist(),
+                category[mask].tolist(),
+                amount[mask].abs().round(2).tolist(),
+                description[mask].tolist(),
+            )))
+        yield batches[0], batches[1], int((~valid).sum())
+
+def rollup_deltas(user_id, kind, rows):
+    """Aggregate imported rows into monthly_rollups upsert parameters"""
+    frame = pd.DataFrame(rows, columns=["date", "category", "amount", "description"])
+    frame["month"] = frame["date"].astype(str).str.slice(0, 7)
+    if kind == "income":
+        frame["category"] = ""
+    grouped = frame.groupby(["month", "category"])["amount"].agg(["sum", "size"]).reset_index()
+    return [
+        (user_id, kind, month, category, round(total, 2), count)
+        for month, category, total, count in zip(
+            grouped["month"].tolist(), grouped["category"].tolist(),
+            grouped["sum"].tolist(), grouped["size"].tolist()
+        )
+    ]
+
+def import_transactions(conn, user_id, path, fmt="expenses", chunk_size=None):
+    """Bulk-load a CSV file in one transaction; returns (expenses, income, rejected) counts"""
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    expenses_added = income_added = rejected = 0
+    started = time.perf_counter()
+    cursor = conn.cursor()
     
-    total_expense = expenses_df["amount"].sum() if not expenses_df.empty else 0
-    total_income = income_df["amount"].sum() if not income_df.empty else 0
-    savings = total_income - total_expense
+    try:
+        for expense_rows, income_rows, bad in read_import_chunks(path, fmt, chunk_size):
+            rejected += bad
+            if expense_rows:
+                categories = {name: resolve_category(conn, name) for name in {row[1] for row in expense_rows}}
+                # (date, stored category name, amount, description, category_id)
+                expense_rows = [
+                    (date, categories[category][1], amount, description, categories[category][0])
+                    for date, category, amount, description in expense_rows
+                ]
+                cursor.executemany(SQL_INSERT_EXPENSE, [(user_id,) + row for row in expense_rows])
+                cursor.executemany(
+                    SQL_UPSERT_ROLLUP, rollup_deltas(user_id, "expense", [row[:4] for row in expense_rows])
+                )
+                expenses_added += len(expense_rows)
+            if income_rows:
+                cursor.executemany(
+                    SQL_INSERT_INCOME,
+                    [(user_id, date, amount, description) for date, _, amount, description in income_rows]
+                )
+                cursor.executemany(SQL_UPSERT_ROLLUP, rollup_deltas(user_id, "income", income_rows))
+                income_added += len(income_rows)
+            print(f"  … {expenses_added + income_added:,} rows staged")
+        bump_data_version(conn, user_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
     
+    elapsed = time.perf_counter() - started
+    total = expenses_added + income_added
+    print(f"✅ Imported {expenses_added:,} expenses and {income_added:,} income records "
+          f"in {elapsed:.2f}s ({total / elapsed if elapsed else total:,.0f} rows/s)")
+    if rejected:
+        print(f"⚠️  Skipped {rejected:,} rows with an invalid date or amount")
+    return expenses_added, income_added, rejected
+
+def import_csv(conn, user_id):
+    """Prompt for a CSV file and import it"""
     print("\n" + "="*50)
-    print("💰 FINANCIAL SUMMARY")
+    print("📥 IMPORT CSV / BANK STATEMENT")
     print("="*50)
-    print(f"💵 Total Income:    ₹{total_income:,.2f}")
-    print(f"💸 Total Expenses:  ₹{total_expense:,.2f}")
-    print(f"💰 Net Savings:     ₹{savings:,.2f}")
-    print(f"📊 Monthly Budget:  ₹{monthly_budget:,.2f}")
+    formats = list(IMPORT_FORMATS)
+    for number, name in enumerate(formats, 1):
+        print(f"{number}. {name}")
     
-    if monthly_budget > 0:
-        monthly_budget = float(monthly_budget)
-        percent_used = (total_expense/monthly_budget) * 100
-        print(f"📈 Budget Used:     {percent_used:.1f}%")
+    try:
+        fmt = formats[int(prompt(f"Choose format (1-{len(formats)}): ")) - 1]
+    except (ValueError, IndexError):
+        print("❌ Invalid format choice!")
+        return
+    path = prompt("CSV file path: ").strip()
     
-    print("="*50)
+    try:
+        import_transactions(conn, user_id, path, fmt)
+    except OSError as e:
+        print(f"❌ Could not read file: {e}")
+    except KeyError as e:
+        print(f"❌ Column {e} not found in the file for format '{fmt}'")
+    except (ValueError,) + DB_ERRORS as e:
+        print(f"❌ Import failed, nothing was imported: {e}")
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "10000"))
+
+EXPORT_COLUMNS = {
+    "expenses": ["id", "user_id", "date", "category", "amount", "description"],
+    "income": ["id", "user_id", "date", "amount", "description"],
+}
+
+def stream_rows(conn, table, user_id=None, start_date=None, end_date=None, category=None, chunk_size=None):
+    """Yield rows of expenses/income in chunks from an unbuffered (server-side) cursor"""
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    conditions, params = [], []
+    if user_id is not None:
+        conditions.append("user_id=%s")
+        params.append(user_id)
+    if start_date:
+        conditions.append("date >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("date <= %s")
+        params.append(end_date)
+    if category:
+        if table != "expenses":
+            raise ValueError("Only expenses can be filtered by category")
+        conditions.append("category=%s")
+        params.append(category)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
     
-    # Budget alerts
-    if total_expense > monthly_budget:
-        print(f"⚠️  ALERT: Monthly budget exceeded by ₹{total_expense - monthly_budget:,.2f}")
-    elif total_expense > monthly_budget * 0.8:
-        print(f"⚠️  WARNING: You've used {(total_expense/monthly_budget)*100:.1f}% of your budget")
-    else:
-        print(f"✅ You're within budget! ₹{monthly_budget - total_expense:,.2f} remaining")
-    print()
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(
+            f"SELECT {', '.join(EXPORT_COLUMNS[table])} FROM {table} {where} ORDER BY user_id, date, id",
+            tuple(params)
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        if conn.unread_result:
+            cursor.fetchall()
+        cursor.close()
+
+def write_csv(path, columns, chunks):
+    """Write row chunks to a CSV file and return the number of rows written"""
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            written += len(rows)
+    return written
 
-def show_charts(conn, user_id):
-    """Display expense visualizations"""
-    expenses_df, income_df = load_user_data(conn, user_id)
+def write_parquet(path, columns, chunks):
+    """Write row chunks to a Parquet file, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
     
-    if expenses_df.empty:
-        print("\n📭 No expenses to visualize")
+    types = {
+        "id": pa.int32(), "user_id": pa.int32(), "date": pa.date32(),
+        "category": pa.string(), "amount": pa.decimal128(10, 2), "description": pa.string(),
+    }
+    schema = pa.schema([(name, types[name]) for name in columns])
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            values = dict(zip(columns, zip(*rows)))
+            if "amount" in values:
+                # SQLite returns NUMERIC amounts as floats; decimal128 needs Decimals
+                values["amount"] = [
+                    amount if isinstance(amount, Decimal) else Decimal(f"{amount:.2f}") for amount in values["amount"]
+                ]
+            table = pa.Table.from_arrays(
+                [pa.array(values[name], type=schema.field(name).type) for name in columns],
+                schema=schema
+            )
+            writer.write_table(table)
+            written += len(rows)
+    return written
+
+def export_transactions(conn, out_dir, fmt="csv", user_id=None, start_date=None, end_date=None,
+                        category=None, chunk_size=None):
+    """Export expenses and income to <out_dir>/<table>.<fmt>; returns {table: rows}"""
+    writer = {"csv": write_csv, "parquet": write_parquet}[fmt]
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    
+    for table, columns in EXPORT_COLUMNS.items():
+        if category and table != "expenses":
+            continue
+        path = os.path.join(out_dir, f"{table}.{fmt}")
+        started = time.perf_counter()
+        chunks = stream_rows(conn, table, user_id, start_date, end_date, category, chunk_size)
+        counts[table] = writer(path, columns, chunks)
+        print(f"✅ Exported {counts[table]:,} {table} rows to {path} "
+              f"in {time.perf_counter() - started:.2f}s")
+    return counts
+
+def export_data(conn, user_id):
+    """Prompt for export options and export the user's data"""
+    print("\n" + "="*50)
+    print("📤 EXPORT DATA")
+    print("="*50)
+    fmt = prompt("Format (csv/parquet) [csv]: ").strip().lower() or "csv"
+    if fmt not in ("csv", "parquet"):
+        print("❌ Format must be csv or parquet!")
         return
+    out_dir = prompt("Output directory [export]: ").strip() or "export"
+    start_date = prompt("From date (YYYY-MM-DD) or Enter for all: ").strip() or None
+    end_date = prompt("To date (YYYY-MM-DD) or Enter for all: ").strip() or None
+    category = prompt("Only this expense category (Enter for all): ").strip() or None
     
-    # Expenses by category
-    category_exp = expenses_df.groupby("category")["amount"].sum().sort_values(ascending=False)
+    try:
+        for value in (start_date, end_date):
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+        export_transactions(conn, out_dir, fmt, user_id, start_date, end_date, category)
+    except ImportError:
+        print("❌ Parquet export needs pyarrow (pip install pyarrow)")
+    except ValueError as e:
+        print(f"❌ Invalid input: {e}")
+    except OSError as e:
+        print(f"❌ Could not write export: {e}")
+    except DB_ERRORS as e:
+        print(f"❌ Database error: {e}")
+
+# ============================================================================
+# SEARCH
+# ============================================================================
+# "fulltext" uses MySQL FULLTEXT indexes built with the ngram parser, which
+# index every 2-character sequence and so can answer substring queries.
+# "trigram" searches an in-memory trigram index built from the user's
+# loaded frames, for backends without FULLTEXT support.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", storage.search)
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "50"))
+NGRAM_TOKEN_SIZE = 2  # MySQL's default ngram_token_size
+
+# (table, index name, columns)
+FULLTEXT_INDEXES = [
+    ("expenses", "ft_expenses_text", "description, category"),
+    ("income", "ft_income_text", "description"),
+]
+
+def add_fulltext_indexes(conn):
+    """Create the ngram FULLTEXT indexes used by search (idempotent)"""
+    existing = set(fetch_all(
+        conn,
+        """SELECT DISTINCT table_name, index_name FROM information_schema.statistics
+           WHERE table_schema = DATABASE() AND index_type = 'FULLTEXT'"""
+    ))
+    cursor = conn.cursor()
+    try:
+        # The default stopword list would drop every ngram containing a
+        # stopword ("a", "i", ...), so searches for "taxi" or "pizza" would
+        # never match. The setting is read when the index is built.
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        for table, name, columns in FULLTEXT_INDEXES:
+            if (table, name) not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({columns}) WITH PARSER ngram")
+                print(f"✅ Created full-text index {name} on {table}")
+    finally:
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = DEFAULT")
+        cursor.close()
+
+def like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def fulltext_search(conn, user_id, query, prefix, limit):
+    """Search with MATCH ... AGAINST, re-checked with LIKE for exact substring/prefix semantics"""
+    escaped = like_escape(query)
+    patterns = (f"{escaped}%", f"% {escaped}%") if prefix else (f"%{escaped}%",)
+    results = []
     
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x=category_exp.values, y=category_exp.index, palette="viridis",legend=False,hue=category_exp.index)
-    plt.title("Expenses by Category", fontsize=16, fontweight='bold')
-    plt.xlabel("Amount (₹)", fontsize=12)
-    plt.ylabel("Category", fontsize=12)
-    plt.tight_layout()
-    plt.show()
+    for table, _, columns in FULLTEXT_INDEXES:
+        fields = [column.strip() for column in columns.split(",")]
+        conditions = ["user_id=%s"]
+        params = [user_id]
+        # Queries shorter than one ngram cannot use the index
+        if len(query) >= NGRAM_TOKEN_SIZE:
+            conditions.append(f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)")
+            params.append('"' + query.replace('"', " ") + '"')
+        conditions.append("(" + " OR ".join(f"{field} LIKE %s" for field in fields for _ in patterns) + ")")
+        params.extend(pattern for _ in fields for pattern in patterns)
+        params.append(limit)
+        
+        category = "category" if table == "expenses" else "NULL"
+        results.extend(fetch_all(
+            conn,
+            f"""SELECT '{table}', id, date, {category}, amount, description FROM {table}
+                WHERE {" AND ".join(conditions)}
+                ORDER BY date DESC, id DESC LIMIT %s""",
+            params
+        ))
     
-    # Monthly expense trend
-    expenses_df['month'] = pd.to_datetime(expenses_df['date']).dt.strftime("%Y-%m")
-    monthly_exp = expenses_df.groupby("month")["amount"].sum()
+    results.sort(key=lambda row: (row[2], row[1]), reverse=True)
+    return results[:limit]
+
+class TrigramIndex:
+    """In-memory trigram index over a list of texts supporting substring and prefix search
     
-    plt.figure(figsize=(10, 6))
-    plt.plot(monthly_exp.index, monthly_exp.values, marker="o", linewidth=2, markersize=8)
-    plt.title("Monthly Expense Trend", fontsize=16, fontweight='bold')
-    plt.xlabel("Month", fontsize=12)
-    plt.ylabel("Amount (₹)", fontsize=12)
-    plt.xticks(rotation=45)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.show()
+    Queries of three or more characters only verify the documents containing
+    all of their trigrams; shorter ones scan every text.
+    """
+    def __init__(self, texts):
+        self.texts = [text.lower() for text in texts]
+        self.postings = defaultdict(list)
+        for doc, text in enumerate(self.texts):
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                self.postings[gram].append(doc)
     
-    # Income vs Expense comparison
-    if not income_df.empty:
-        income_df['month'] = pd.to_datetime(income_df['date']).dt.strftime("%Y-%m")
-        monthly_inc = income_df.groupby("month")["amount"].sum()
-        
-        all_months = sorted(set(monthly_exp.index) | set(monthly_inc.index))
-        exp_aligned = [monthly_exp.get(m, 0) for m in all_months]
-        inc_aligned = [monthly_inc.get(m, 0) for m in all_months]
+    def memory_usage(self):
+        """Approximate size in bytes of the texts, posting lists and document numbers"""
+        size = sys.getsizeof(self.texts) + sys.getsizeof(self.postings)
+        size += sum(map(sys.getsizeof, self.texts))
+        size += sum(sys.getsizeof(gram) + sys.getsizeof(docs) for gram, docs in self.postings.items())
+        return size + sys.getsizeof(len(self.texts)) * len(self.texts)
+    
+    def search(self, query, prefix=False):
+        """Yield matching document numbers, highest first"""
+        query = query.lower()
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        if grams:
+            lists = sorted((self.postings.get(gram, []) for gram in grams), key=len)
+            candidates = sorted(set(lists[0]).intersection(*lists[1:]), reverse=True)
+        else:
+            candidates = range(len(self.texts) - 1, -1, -1)
         
-        plt.figure(figsize=(10, 6))
-        x = np.arange(len(all_months))
-        width = 0.35
-        plt.bar(x - width/2, inc_aligned, width, label='Income', color='green', alpha=0.7)
-        plt.bar(x + width/2, exp_aligned, width, label='Expenses', color='red', alpha=0.7)
-        plt.xlabel('Month', fontsize=12)
-        plt.ylabel('Amount (₹)', fontsize=12)
-        plt.title('Income vs Expenses', fontsize=16, fontweight='bold')
-        plt.xticks(x, all_months, rotation=45)
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
+        for doc in candidates:
+            text = self.texts[doc]
+            if prefix:
+                matched = text.startswith(query) or f" {query}" in text
+            else:
+                matched = query in text
+            if matched:
+                yield doc
 
-# ============================================================================
-# MAIN MENU
-# ============================================================================
-def display_menu():
-    """Display the main menu"""
-    print("\n" + "="*50)
-    print("💼 EXPENSE TRACKER - MAIN MENU")
-    print("="*50)
-    print("1.  ➕ Add Expense")
-    print("2.  ➕ Add Income")
-    print("3.  📋 View All Expenses")
-    print("4.  📋 View All Income")
-    print("5.  ✏️  Edit Expense")
-    print("6.  ✏️  Edit Income")
-    print("7.  🗑️  Delete Expense")
+def get_trigram_index(conn, user_id):
+    """Return (frames, indexes) for the user, rebuilding the indexes when their data changed
+    
+    The indexes are attached to the user's frame_cache entry, so they count
+    against FRAME_CACHE_MAX_MB and are evicted together with the frames.
+    """
+    frames = dict(zip(("expenses", "income"), load_user_data(conn, user_id)))
+    indexes = frame_cache.get_extra(user_id, frames["expenses"], "trigram")
+    if indexes is not None:
+        return frames, indexes
+    
+    indexes = {}
+    for table, frame in frames.items():
+        texts = frame["description"].astype(str)
+        if "category" in frame:
+            texts = texts + " " + frame["category"].astype(str)
+        indexes[table] = TrigramIndex(texts.tolist())
+    size = sum(index.memory_usage() for index in indexes.values())
+    frame_cache.attach(user_id, frames["expenses"], "trigram", indexes, size)
+    return frames, indexes
+
+def trigram_search(conn, user_id, query, prefix, limit):
+    """Search the user's loaded frames through cached trigram indexes"""
+    frames, indexes = get_trigram_index(conn, user_id)
+    results = []
+    for table, frame in frames.items():
+        # Both frames are in date order, so each table's first `limit` hits are its newest
+        for doc in itertools.islice(indexes[table].search(query, prefix), limit):
+            row = frame.iloc[doc]
+            results.append((
+                table, int(row["id"]), row["date"].date(), row.get("category"),
+                int(row["amount_minor"]) / 100, row["description"]
+            ))
+    results.sort(key=lambda row: (row[2], row[1]), reverse=True)
+    return results[:limit]
+
+def search_transactions(conn, user_id, query, prefix=False, limit=None):
+    """Find the user's expenses and income whose description or category contains query
+    
+    With prefix=True only matches at the start of a word count. Returns
+    (table, id, date, category, amount, description) rows, newest first.
+    """
+    query = " ".join(query.split())
+    if not query:
+        return []
+    search = trigram_search if SEARCH_BACKEND == "trigram" else fulltext_search
+    return search(conn, user_id, query, prefix, limit or SEARCH_LIMIT)
+
+def search_menu(conn, user_id):
+    """Prompt for a search term and print the matching transactions"""
+    query = prompt("Search description/category: ").strip()
+    if not query:
+        return
+    prefix = prompt("Match word prefixes only? (y/N): ").strip().lower() == "y"
+    
+    started = time.perf_counter()
+    try:
+        results = search_transactions(conn, user_id, query, prefix)
+    except DB_ERRORS as e:
+        print(f"❌ Database error: {e}")
+        return
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    if not results:
+        print(f"\n📭 No transactions match '{query}'")
+        return
+    print(f"\n{'Type':<9} {'ID':<5} {'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<30}")
+    print("-" * 85)
+    for table, record_id, date, category, amount, description in results:
+        print(f"{table:<9} {record_id:<5} {str(date):<12} {category or '-':<15} ₹{float(amount):<9.2f} {description or '':<30}")
+    print(f"\n🔎 {len(results)} result(s) in {elapsed:.1f} ms")
+
+# ============================================================================
+# AI INSIGHTS USING GEMINI
+# ============================================================================
+# "aggregate" prompts summarise the whole history from monthly_rollups;
+# "recent" prompts list the latest AI_RECENT_ROWS expenses one per line.
+# Either way the data section is trimmed to AI_PROMPT_TOKEN_BUDGET tokens.
+AI_PROMPT_MODE = os.getenv("AI_PROMPT_MODE", "aggregate")
+AI_RECENT_ROWS = int(os.getenv("AI_RECENT_ROWS", "30"))
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "800"))
+
+def estimate_tokens(text):
+    """Rough token count for a prompt (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+def fit_lines(lines, budget):
+    """Return the leading lines that fit in `budget` tokens, and the tokens left over"""
+    kept = []
+    for line in lines:
+        cost = estimate_tokens(line)
+        if cost > budget:
+            break
+        kept.append(line)
+        budget -= cost
+    return kept, budget
+
+def fetch_recent_expenses(conn, user_id, limit):
+    """Return the user's newest expenses as (date, category, amount, description) rows"""
+    return fetch_all(
+        conn,
+        """SELECT date, category, amount, description FROM expenses
+           WHERE user_id=%s ORDER BY date DESC, id DESC LIMIT %s""",
+        (user_id, limit)
+    )
+
+def recent_prompt_data(conn, user_id, budget):
+    """Return the prompt data section listing recent expenses (None if there are none)"""
+    rows = fetch_recent_expenses(conn, user_id, AI_RECENT_ROWS)
+    if not rows:
+        return None
+    lines, _ = fit_lines(
+        [f"{date} | {category} | {amount} | {description or ''}" for date, category, amount, description in rows],
+        budget
+    )
+    return "Recent expenses (date | category | amount | description):\n" + "\n".join(lines)
+
+def aggregate_prompt_data(conn, user_id, budget):
+    """Return the prompt data section with per-category and per-month totals (None if there are no expenses)"""
+    categories = fetch_all(
+        conn,
+        """SELECT category, ROUND(SUM(total), 2), SUM(count) FROM monthly_rollups
+           WHERE user_id=%s AND kind='expense'
+           GROUP BY category ORDER BY SUM(total) DESC""",
+        (user_id,)
+    )
+    if not categories:
+        return None
+    
+    # Categories come largest first and months newest first, so whatever the
+    # budget cuts off is the least useful part of each section.
+    # Categories get half the budget; months get the other half plus whatever
+    # the categories left unused.
+    category_lines, spare = fit_lines(
+        [f"{category}: ₹{float(total):.2f} over {count} expenses" for category, total, count in categories],
+        budget // 2
+    )
+    monthly = get_monthly_frame(conn, user_id).iloc[::-1]
+    month_lines, _ = fit_lines(
+        [f"{month}: spent ₹{row.expense:.2f}, earned ₹{row.income:.2f}" for month, row in monthly.iterrows()],
+        budget - budget // 2 + spare
+    )
+    return (
+        f"Spending by category ({len(category_lines)} of {len(categories)}):\n" + "\n".join(category_lines)
+        + f"\n\nMonthly totals, newest first ({len(month_lines)} of {len(monthly)} months):\n" + "\n".join(month_lines)
+    )
+
+PROMPT_BUILDERS = {
+    "aggregate": aggregate_prompt_data,
+    "recent": recent_prompt_data,
+}
+
+def build_insights_prompt(conn, user_id, monthly_budget, mode=None, token_budget=None):
+    """Build the advisor prompt from the user's expenses (None if there are none)"""
+    # print("Available models:")
+    # for m in genai.list_models():
+    #     if 'generateContent' in m.supported_generation_methods:
+    #         print(f"  - {m.name}")
+    data = PROMPT_BUILDERS[mode or AI_PROMPT_MODE](
+        conn, user_id, token_budget or AI_PROMPT_TOKEN_BUDGET
+    )
+    if data is None:
+        return None
+    # AI prompt
+    return f"""You are a personal finance advisor.
+
+Monthly budget: ₹{monthly_budget}
+
+Tasks:
+1. Identify unnecessary or avoidable expenses.
+2. Explain why they are unnecessary.
+3. Suggest 3 clear ways to increase savings.
+
+Keep the advice short, practical, and beginner-friendly.
+
+{data}
+"""
+
+# AI_BACKEND=stub swaps Gemini for StubModel so insights work offline and in
+# tests without an API key or network access.
+AI_BACKEND = os.getenv("AI_BACKEND", "gemini")
+AI_MODEL = os.getenv("AI_MODEL", "gemini-2.5-flash")
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", ".ai_cache.sqlite3")
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", str(24 * 3600)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "500"))
+AI_CACHE_MAX_BYTES = int(os.getenv("AI_CACHE_MAX_BYTES", str(5 * 1024 * 1024)))
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "60"))
+AI_RETRIES = int(os.getenv("AI_RETRIES", "3"))
+AI_RETRY_BACKOFF = float(os.getenv("AI_RETRY_BACKOFF", "1.0"))
+AI_BATCH_CONCURRENCY = int(os.getenv("AI_BATCH_CONCURRENCY", "4"))
+AI_BATCH_RATE = float(os.getenv("AI_BATCH_RATE", "1.0"))
+
+# google.api_core exception names worth retrying; matched by name so the
+# google packages are only imported when Gemini is actually used.
+TRANSIENT_ERROR_NAMES = {
+    "ServiceUnavailable", "ResourceExhausted", "TooManyRequests",
+    "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+}
+
+class TransientModelError(Exception):
+    """Temporary model failure that is safe to retry"""
+
+def is_transient(error):
+    return isinstance(error, (TransientModelError, ConnectionError, TimeoutError)) \
+        or type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+class StubModel:
+    """Offline stand-in for genai.GenerativeModel
+    
+    `latency` delays the first chunk, `chunk_delay` is slept between chunks and
+    the first `failures` calls raise TransientModelError, so timeouts,
+    cancellation and retries can be exercised without the network.
+    """
+    def __init__(self, model_name, latency=0.0, chunk_delay=0.0, failures=0):
+        self.model_name = model_name
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.failures = failures
+        self.calls = 0
+    
+    def generate_content(self, prompt, stream=False, request_options=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise TransientModelError(f"stub failure {self.calls} of {self.failures}")
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:12]
+        text = f"[{self.model_name}] Stub advice for prompt {digest} ({len(prompt)} chars)."
+        chunks = self._chunks(text)
+        if stream:
+            return chunks
+        return SimpleNamespace(text="".join(chunk.text for chunk in chunks))
+    
+    def _chunks(self, text):
+        time.sleep(self.latency)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield SimpleNamespace(text=word if i == len(words) - 1 else word + " ")
+
+def get_model(model_name=None):
+    """Return the configured model client (Gemini, or the stub when AI_BACKEND=stub)"""
+    model_name = model_name or AI_MODEL
+    if AI_BACKEND == "stub":
+        return StubModel(
+            model_name,
+            latency=float(os.getenv("AI_STUB_LATENCY", "0")),
+            chunk_delay=float(os.getenv("AI_STUB_CHUNK_DELAY", "0")),
+            failures=int(os.getenv("AI_STUB_FAILURES", "0")),
+        )
+    return genai.GenerativeModel(model_name)
+
+def model_cache_key(model=None):
+    """Return the cache namespace of a model client (the configured one when None)
+    
+    Gemini clients report their name as "models/<name>"; the prefix is dropped
+    so an injected client shares entries with the configured one.
+    """
+    if model is None:
+        return f"{AI_BACKEND}:{AI_MODEL}"
+    backend = "stub" if isinstance(model, StubModel) else "gemini"
+    return f"{backend}:{model.model_name.removeprefix('models/')}"
+
+class ResponseCache:
+    """SQLite-backed cache of model responses keyed by a hash of model name + prompt
+    
+    Entries expire after `ttl` seconds, and the least recently used ones are
+    evicted once the cache holds more than `max_entries` or `max_bytes`.
+    """
+    def __init__(self, path=None, ttl=None, max_entries=None, max_bytes=None):
+        self.ttl = AI_CACHE_TTL if ttl is None else ttl
+        self.max_entries = AI_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = AI_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or AI_CACHE_PATH, check_same_thread=False)
+        self.db.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self.db.commit()
+    
+    @staticmethod
+    def fingerprint(model_name, prompt):
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode()).hexdigest()
+    
+    def get(self, model_name, prompt):
+        """Return the cached response, or None on a miss or an expired entry"""
+        key = self.fingerprint(model_name, prompt)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT response, created_at FROM responses WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.db.execute("DELETE FROM responses WHERE key=?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE responses SET accessed_at=? WHERE key=?", (now, key))
+            self.db.commit()
+            return row[0]
+    
+    def put(self, model_name, prompt, response):
+        """Store a response and evict entries beyond the TTL and size limits"""
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (self.fingerprint(model_name, prompt), model_name, response,
+                 len(response.encode()), now, now)
+            )
+            self.db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            self.db.execute(
+                """DELETE FROM responses WHERE key IN (
+                       SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,)
+            )
+            self.db.execute(
+                """DELETE FROM responses WHERE key IN (
+                       SELECT key FROM (
+                           SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running
+                           FROM responses)
+                       WHERE running > ?)""",
+                (self.max_bytes,)
+            )
+            self.db.commit()
+    
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses")
+            self.db.commit()
+
+_response_cache = None
+
+def get_response_cache():
+    """Return the process-wide response cache, opening it on first use"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+class InsightsJob:
+    """Generate a model response on a background thread
+    
+    Chunks are handed over through a queue as they arrive; stream() yields
+    them until the response is complete, the deadline passes (TimeoutError)
+    or cancel() is called. Transient errors are retried with exponential
+    backoff as long as nothing has been streamed yet.
+    """
+    def __init__(self, prompt, timeout=None, retries=None, use_cache=True, model=None):
+        self.prompt = prompt
+        self.timeout = AI_TIMEOUT if timeout is None else timeout
+        self.retries = AI_RETRIES if retries is None else retries
+        self.use_cache = use_cache
+        self.model = model
+        self.cache_key = model_cache_key(model)
+        self.chunks = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.deadline = None
+    
+    def start(self):
+        self.deadline = time.monotonic() + self.timeout
+        self.thread.start()
+        return self
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    def _run(self):
+        try:
+            if self.use_cache:
+                cached = get_response_cache().get(self.cache_key, self.prompt)
+                if cached is not None:
+                    self.chunks.put(("chunk", cached))
+                    self.chunks.put(("done", None))
+                    return
+            
+            model = self.model or get_model()
+            for attempt in range(self.retries + 1):
+                parts = []
+                try:
+                    response = model.generate_content(
+                        self.prompt, stream=True, request_options={"timeout": self.timeout}
+                    )
+                    for chunk in response:
+                        if self.cancelled.is_set():
+                            return
+                        parts.append(chunk.text)
+                        self.chunks.put(("chunk", chunk.text))
+                    break
+                except Exception as e:
+                    if parts or attempt == self.retries or not is_transient(e):
+                        raise
+                    delay = AI_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+                    if self.cancelled.wait(min(delay, max(self.deadline - time.monotonic(), 0))):
+                        return
+            
+            if self.use_cache:
+                get_response_cache().put(self.cache_key, self.prompt, "".join(parts))
+            self.chunks.put(("done", None))
+        except Exception as e:
+            self.chunks.put(("error", e))
+    
+    def stream(self):
+        """Yield response chunks as they arrive"""
+        if self.deadline is None:
+            self.start()
+        while True:
+            remaining = self.deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise queue.Empty
+                kind, value = self.chunks.get(timeout=remaining)
+            except queue.Empty:
+                self.cancel()
+                raise TimeoutError(f"no response from the model within {self.timeout:g}s") from None
+            if kind == "chunk":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    
+    def result(self):
+        """Wait for the whole response and return it"""
+        return "".join(self.stream())
+
+def ask_gemini(prompt, use_cache=True, timeout=None):
+    """Send a prompt to the model and return the response text, served from cache when possible"""
+    return InsightsJob(prompt, timeout=timeout, use_cache=use_cache).result()
+
+def get_ai_insights(conn,user_id,monthly_budget):
+    prompt = build_insights_prompt(conn, user_id, monthly_budget)
+    if prompt is None:
+        print("📭 No expenses found. Add some expenses first.")
+        return
+    print("\n" + "="*50)
+    print("🤖 AI FINANCIAL INSIGHTS")
+    print("="*50)
+    print("(press Ctrl+C to cancel)\n")
+    #Calling Gemini in the background so a slow response can be cancelled
+    job = InsightsJob(prompt).start()
+    try:
+        for chunk in job.stream():
+            print(chunk, end="", flush=True)
+        print("\n\n" + "="*50)
+    except KeyboardInterrupt:
+        job.cancel()
+        print("\n⚠️ Insights cancelled")
+    except TimeoutError as e:
+        print(f"\n❌ {e}")
+    except Exception as e:
+        print("\n❌ Error while calling Gemini AI")
+        print(e)
+
+# ============================================================================
+# BATCH INSIGHTS
+# ============================================================================
+SQL_INSERT_INSIGHT = """INSERT INTO ai_insights
+    (user_id, created_at, model, status, insights, error, prompt_tokens, latency_ms)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
+
+def create_insights_table(conn):
+    """Create ai_insights, where the batch job stores each user's advice"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ai_insights (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            created_at DATETIME NOT NULL,
+            model VARCHAR(100) NOT NULL,
+            status ENUM('ok', 'error') NOT NULL,
+            insights TEXT,
+            error VARCHAR(255),
+            prompt_tokens INT NOT NULL DEFAULT 0,
+            latency_ms INT NOT NULL DEFAULT 0,
+            INDEX idx_ai_insights_user_created (user_id, created_at),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """)
+    finally:
+        cursor.close()
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts of `burst`"""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a call is allowed"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 when empty)"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def generate_user_insights(prompt, limiter, use_cache, model=None):
+    """Worker: call the model for one prompt, returning (text, error, latency_ms)"""
+    limiter.acquire()
+    started = time.perf_counter()
+    try:
+        text, error = InsightsJob(prompt, use_cache=use_cache, model=model).result(), None
+    except Exception as e:
+        text, error = None, f"{type(e).__name__}: {e}"
+    return text, error, int((time.perf_counter() - started) * 1000)
+
+def run_insights_batch(conn, concurrency=None, rate=None, use_cache=True, model=None):
+    """Generate insights for every user with expenses and store them in ai_insights
+    
+    Prompts are built on this connection, model calls run on a thread pool of
+    `concurrency` workers sharing a limit of `rate` calls per second, and the
+    results are written back here as they complete. `model` is a client to
+    use instead of the configured one. Returns run metrics.
+    """
+    concurrency = concurrency or AI_BATCH_CONCURRENCY
+    limiter = RateLimiter(rate or AI_BATCH_RATE, burst=concurrency)
+    # Same "<backend>:<name>" the response cache is keyed by
+    model_name = model_cache_key(model)
+    started = time.perf_counter()
+    
+    prompts = {}
+    for user_id, monthly_budget in fetch_all(conn, "SELECT id, monthly_budget FROM users ORDER BY id"):
+        prompt = build_insights_prompt(conn, user_id, monthly_budget)
+        if prompt is not None:
+            prompts[user_id] = prompt
+    
+    latencies = []
+    failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(generate_user_insights, prompt, limiter, use_cache, model): user_id
+            for user_id, prompt in prompts.items()
+        }
+        for future in as_completed(futures):
+            user_id = futures[future]
+            text, error, latency_ms = future.result()
+            latencies.append(latency_ms)
+            failed += error is not None
+            try:
+                execute_write(conn, SQL_INSERT_INSIGHT, (
+                    user_id, datetime.now(), model_name, "error" if error else "ok",
+                    text, error and error[:255], estimate_tokens(prompts[user_id]), latency_ms
+                ))
+                conn.commit()
+            except DB_ERRORS as e:
+                conn.rollback()
+                print(f"❌ Could not save insights for user {user_id}: {e}")
+            print(f"{'❌' if error else '✅'} user {user_id}: {latency_ms} ms")
+    
+    elapsed = time.perf_counter() - started
+    return {
+        "users": len(prompts),
+        "succeeded": len(prompts) - failed,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "users_per_second": round(len(prompts) / elapsed, 3) if elapsed else 0,
+        "latency_ms_p50": percentile(latencies, 50),
+        "latency_ms_p95": percentile(latencies, 95),
+        "latency_ms_max": max(latencies, default=0),
+    }
+
+# ============================================================================
+# ANALYTICS & REPORTING
+# ============================================================================
+FRAME_CACHE_MAX_BYTES = int(os.getenv("FRAME_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+class FrameCache:
+    """LRU cache of each user's (expenses, income) frames, bounded by memory use
+    
+    Entries are tagged with users.data_version, so a frame loaded before any
+    write (from this process or another one) is never served. Structures
+    derived from the frames (such as search indexes) can be attached to an
+    entry; they count towards max_bytes and are dropped with it.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+    
+    def get(self, user_id, version):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self.entries.move_to_end(user_id)
+            return entry[1], entry[2]
+    
+    def put(self, user_id, version, expenses, income):
+        size = int(expenses.memory_usage(deep=True).sum() + income.memory_usage(deep=True).sum())
+        with self.lock:
+            self._drop(user_id)
+            if size > self.max_bytes:
+                return
+            self.entries[user_id] = [version, expenses, income, size, {}]
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+    
+    def get_extra(self, user_id, expenses, key):
+        """Return the value attached under key to the entry holding these frames, or None"""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[1] is not expenses:
+                return None
+            self.entries.move_to_end(user_id)
+            return entry[4].get(key)
+    
+    def attach(self, user_id, expenses, key, value, size):
+        """Attach value to the entry holding these frames (no-op once it is gone)"""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[1] is not expenses or key in entry[4]:
+                return
+            entry[4][key] = value
+            entry[3] += size
+            self.nbytes += size
+            self.entries.move_to_end(user_id)
+            while self.nbytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+    
+    def invalidate(self, user_id):
+        with self.lock:
+            self._drop(user_id)
+    
+    def _drop(self, user_id):
+        entry = self.entries.pop(user_id, None)
+        if entry is not None:
+            self.nbytes -= entry[3]
+
+frame_cache = FrameCache(FRAME_CACHE_MAX_BYTES)
+
+# Columns loaded into the analytics frames. Amounts arrive as integer minor
+# units (paise) so they can be stored as int64 instead of Decimal objects.
+FRAME_COLUMNS = {
+    "expenses": ["id", "date", "category", "amount_minor", "description"],
+    "income": ["id", "date", "amount_minor", "description"],
+}
+
+def load_frame(conn, table, user_id):
+    """Load one table of the user's rows as a compact DataFrame ordered by date
+    
+    id is int32, date datetime64, category categorical and amount_minor int64
+    minor units (divide by 100 for rupees).
+    """
+    columns = ", ".join(
+        "CAST(ROUND(amount * 100) AS SIGNED)" if name == "amount_minor" else name
+        for name in FRAME_COLUMNS[table]
+    )
+    rows = fetch_all(
+        conn,
+        f"SELECT {columns} FROM {table} WHERE user_id=%s ORDER BY date, id",
+        (user_id,)
+    )
+    frame = pd.DataFrame.from_records(rows, columns=FRAME_COLUMNS[table])
+    frame = frame.astype({"id": "int32", "amount_minor": "int64"})
+    frame["date"] = pd.to_datetime(frame["date"])
+    if "category" in frame:
+        frame["category"] = frame["category"].astype("category")
+    frame["description"] = frame["description"].fillna("")
+    return frame
+
+def load_user_data(conn, user_id):
+    """Load user's expenses and income into pandas DataFrames
+    
+    Frames are cached per user until their data changes, so treat them as
+    read-only (copy before modifying).
+    """
+    version = get_data_version(conn, user_id)
+    cached = frame_cache.get(user_id, version)
+    if cached is not None:
+        return cached
+    
+    expenses = load_frame(conn, "expenses", user_id)
+    income = load_frame(conn, "income", user_id)
+    frame_cache.put(user_id, version, expenses, income)
+    return expenses, income
+
+def frame_memory_report(conn, user_id):
+    """Return row counts and per-column memory use (bytes) of the user's loaded frames"""
+    expenses, income = load_user_data(conn, user_id)
+    report = {}
+    for name, frame in (("expenses", expenses), ("income", income)):
+        usage = frame.memory_usage(deep=True, index=False)
+        report[name] = {
+            "rows": len(frame),
+            "bytes": int(usage.sum()),
+            "columns": {column: {"dtype": str(frame[column].dtype), "bytes": int(usage[column])}
+                        for column in frame.columns},
+        }
+    return report
+
+def get_summary_totals(conn, user_id):
+    """Return (total_income, total_expense) computed by the database"""
+    total_income, total_expense = fetch_one(
+        conn,
+        """SELECT
+               (SELECT ROUND(COALESCE(SUM(amount), 0), 2) FROM income WHERE user_id=%s),
+               (SELECT ROUND(COALESCE(SUM(amount), 0), 2) FROM expenses WHERE user_id=%s)""",
+        (user_id, user_id)
+    )
+    return float(total_income), float(total_expense)
+
+def budget_status(total_expense, monthly_budget):
+    """Return (percent_used, alert) where alert is 'exceeded', 'warning' or 'ok'"""
+    monthly_budget = float(monthly_budget)
+    percent_used = (total_expense/monthly_budget) * 100 if monthly_budget > 0 else None
+    
+    if total_expense > monthly_budget:
+        alert = "exceeded"
+    elif total_expense > monthly_budget * 0.8:
+        alert = "warning"
+    else:
+        alert = "ok"
+    return percent_used, alert
+
+def get_summary(conn, user_id, monthly_budget):
+    """Return the financial summary figures as a dict"""
+    total_income, total_expense = get_summary_totals(conn, user_id)
+    percent_used, alert = budget_status(total_expense, monthly_budget)
+    return {
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "savings": total_income - total_expense,
+        "monthly_budget": float(monthly_budget),
+        "percent_used": percent_used,
+        "alert": alert,
+    }
+
+def show_summary(conn, user_id, monthly_budget):
+    """Display financial summary"""
+    summary = get_summary(conn, user_id, monthly_budget)
+    total_income = summary["total_income"]
+    total_expense = summary["total_expense"]
+    savings = summary["savings"]
+    monthly_budget = summary["monthly_budget"]
+    percent_used, alert = summary["percent_used"], summary["alert"]
+    
+    print("\n" + "="*50)
+    print("💰 FINANCIAL SUMMARY")
+    print("="*50)
+    print(f"💵 Total Income:    ₹{total_income:,.2f}")
+    print(f"💸 Total Expenses:  ₹{total_expense:,.2f}")
+    print(f"💰 Net Savings:     ₹{savings:,.2f}")
+    print(f"📊 Monthly Budget:  ₹{monthly_budget:,.2f}")
+    
+    if percent_used is not None:
+        print(f"📈 Budget Used:     {percent_used:.1f}%")
+    
+    print("="*50)
+    
+    # Budget alerts
+    if alert == "exceeded":
+        print(f"⚠️  ALERT: Monthly budget exceeded by ₹{total_expense - monthly_budget:,.2f}")
+    elif alert == "warning":
+        print(f"⚠️  WARNING: You've used {percent_used:.1f}% of your budget")
+    else:
+        print(f"✅ You're within budget! ₹{monthly_budget - total_expense:,.2f} remaining")
+    print()
+
+def use_headless_backend():
+    """Switch matplotlib to the non-interactive Agg backend"""
+    import matplotlib
+    if "matplotlib.pyplot" in sys.modules:
+        plt.switch_backend("Agg")
+    else:
+        matplotlib.use("Agg")
+
+def finish_chart(name, out_dir, saved, fmt="png", prefix=""):
+    """Show the current figure, or save it to out_dir when rendering to files"""
+    if out_dir is None:
+        plt.show()
+        return
+    path = os.path.join(out_dir, f"{prefix}{name}.{fmt}")
+    plt.savefig(path)
+    plt.close()
+    saved.append(path)
+
+def show_charts(conn, user_id, out_dir=None, fmt="png", prefix=""):
+    """Display expense visualizations, or save them to out_dir; returns saved paths"""
+    category_exp = get_category_totals(conn, user_id)
+    saved = []
+    
+    if category_exp.empty:
+        print("\n📭 No expenses to visualize")
+        return saved
+    
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        use_headless_backend()
+    
+    # Expenses by category
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x=category_exp.values, y=category_exp.index, palette="viridis",legend=False,hue=category_exp.index)
+    plt.title("Expenses by Category", fontsize=16, fontweight='bold')
+    plt.xlabel("Amount (₹)", fontsize=12)
+    plt.ylabel("Category", fontsize=12)
+    plt.tight_layout()
+    finish_chart("category_expenses", out_dir, saved, fmt, prefix)
+    
+    # Monthly expense trend
+    monthly = get_monthly_frame(conn, user_id)
+    monthly_exp = monthly["expense"][monthly["expense"] > 0]
+    
+    plt.figure(figsize=(10, 6))
+    plt.plot(monthly_exp.index, monthly_exp.values, marker="o", linewidth=2, markersize=8)
+    plt.title("Monthly Expense Trend", fontsize=16, fontweight='bold')
+    plt.xlabel("Month", fontsize=12)
+    plt.ylabel("Amount (₹)", fontsize=12)
+    plt.xticks(rotation=45)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    finish_chart("monthly_trend", out_dir, saved, fmt, prefix)
+    
+    # Income vs Expense comparison
+    if (monthly["income"] > 0).any():
+        all_months = monthly.index
+        exp_aligned = monthly["expense"].to_numpy()
+        inc_aligned = monthly["income"].to_numpy()
+        
+        plt.figure(figsize=(10, 6))
+        x = np.arange(len(all_months))
+        width = 0.35
+        plt.bar(x - width/2, inc_aligned, width, label='Income', color='green', alpha=0.7)
+        plt.bar(x + width/2, exp_aligned, width, label='Expenses', color='red', alpha=0.7)
+        plt.xlabel('Month', fontsize=12)
+        plt.ylabel('Amount (₹)', fontsize=12)
+        plt.title('Income vs Expenses', fontsize=16, fontweight='bold')
+        plt.xticks(x, all_months, rotation=45)
+        plt.legend()
+        plt.grid(True, alpha=0.3)
+        plt.tight_layout()
+        finish_chart("income_vs_expenses", out_dir, saved, fmt, prefix)
+    
+    return saved
+
+def render_charts(conn, user_id, out_dir=None, fmt="png"):
+    """Render the charts to files headlessly, reusing earlier files if the data is unchanged
+    
+    Files are named after the user's data version, and a small manifest lists
+    what was rendered for that version, so a cache hit costs one lookup.
+    """
+    out_dir = out_dir or CHART_CACHE_DIR
+    prefix = f"user{user_id}_v{get_data_version(conn, user_id)}_"
+    manifest = os.path.join(out_dir, f"{prefix}{fmt}.json")
+    
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as f:
+            paths = json.load(f)
+        if all(os.path.exists(path) for path in paths):
+            return paths
+    
+    # Drop files rendered for older versions of this user's data
+    for stale in glob.glob(os.path.join(out_dir, f"user{user_id}_v*")):
+        if not os.path.basename(stale).startswith(prefix):
+            os.remove(stale)
+    
+    paths = show_charts(conn, user_id, out_dir, fmt, prefix)
+    if paths:
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump(paths, f)
+    return paths
+
+def add_data_version_column(conn):
+    """Add users.data_version, the per-user change counter used by caches"""
+    exists = fetch_one(
+        conn,
+        """SELECT COUNT(*) FROM information_schema.columns
+           WHERE table_schema = DATABASE() AND table_name = 'users' AND column_name = 'data_version'"""
+    )[0]
+    if not exists:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("ALTER TABLE users ADD COLUMN data_version BIGINT NOT NULL DEFAULT 0")
+        finally:
+            cursor.close()
+
+# ============================================================================
+# SCHEMA MIGRATIONS
+# ============================================================================
+# Migrations run in order and each one is recorded in schema_version. MySQL
+# commits DDL implicitly, so every migration must be safe to re-run if the
+# process dies half way through one.
+MIGRATIONS = [
+    (1, "Create users, expenses and income tables", create_tables),
+    (2, "Add monthly_rollups", create_rollup_table),
+    (3, "Add user/date/category indexes", ensure_indexes),
+    (4, "Add users.data_version", add_data_version_column),
+    (5, "Add ai_insights", create_insights_table),
+    (6, "Add categories and expenses.category_id", add_categories),
+    (7, "Add full-text search indexes", add_fulltext_indexes),
+]
+
+# SQLite databases start at the current schema in one step; later
+# migrations need an entry in both lists.
+SQLITE_MIGRATIONS = [
+    (7, "Create schema", create_sqlite_schema),
+]
+
+def current_schema_version(conn):
+    """Return the applied schema version, or None if schema_version does not exist yet"""
+    try:
+        return fetch_one(conn, "SELECT MAX(version) FROM schema_version")[0] or 0
+    except DB_ERRORS as e:
+        if storage.is_missing_table(e):
+            return None
+        raise
+
+def migrate(conn):
+    """Apply any pending migrations; a no-op single lookup when the schema is current"""
+    version = current_schema_version(conn)
+    migrations = storage.migrations()
+    latest = migrations[-1][0]
+    if version is not None and version >= latest:
+        return
+    
+    cursor = conn.cursor()
+    try:
+        if version is None:
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            version = 0
+        
+        for number, description, apply in migrations:
+            if number <= version:
+                continue
+            print(f"🔧 Applying migration {number}: {description}")
+            apply(conn)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                (number, description)
+            )
+            conn.commit()
+        
+        print(f"✅ Database schema is at version {latest}")
+        
+    except DB_ERRORS as e:
+        conn.rollback()
+        print(f"❌ Error migrating database schema: {e}")
+        sys.exit(1)
+    finally:
+        cursor.close()
+
+# ============================================================================
+# MAIN MENU
+# ============================================================================
+def display_menu():
+    """Display the main menu"""
+    print("\n" + "="*50)
+    print("💼 EXPENSE TRACKER - MAIN MENU")
+    print("="*50)
+    print("1.  ➕ Add Expense")
+    print("2.  ➕ Add Income")
+    print("3.  📋 View All Expenses")
+    print("4.  📋 View All Income")
+    print("5.  ✏️  Edit Expense")
+    print("6.  ✏️  Edit Income")
+    print("7.  🗑️  Delete Expense")
     print("8.  🗑️  Delete Income")
     print("9.  💰 View Summary & Savings")
     print("10. 📊 Show Charts")
     print("11. 🤖 AI Insights (Smart Suggestions)")
-    print("12. 🚪 Exit")
+    print("12. 🔎 Search Transactions")
+    print("13. 🛠️  Tools & Maintenance")
+    print("14. 🚪 Exit")
     print("="*50)
 
+MENU_ACTIONS = {
+    "1": "add_expense", "2": "add_income", "3": "view_expenses", "4": "view_income",
+    "5": "edit_expense", "6": "edit_income", "7": "delete_expense", "8": "delete_income",
+    "9": "summary", "10": "charts", "11": "ai_insights", "12": "search", "13": "tools", "14": "exit",
+}
+TOOLS_ACTIONS = {
+    "1": "rebuild_rollups", "2": "check_indexes", "3": "import", "4": "export",
+    "5": "startup_report", "6": "stats", "7": "back",
+}
+
+def tools_menu(conn, user_id):
+    """Maintenance commands that are not part of day-to-day tracking"""
+    while True:
+        print("\n" + "="*50)
+        print("🛠️  TOOLS & MAINTENANCE")
+        print("="*50)
+        print("1. 🔄 Rebuild Monthly Rollups")
+        print("2. 🔍 Check Index Usage")
+        print("3. 📥 Import CSV / Bank Statement")
+        print("4. 📤 Export Data (CSV / Parquet)")
+        print("5. ⏱️  Startup Import Report")
+        print("6. 📈 Performance Stats")
+        print("7. ↩️  Back")
+        print("="*50)
+        choice = prompt("Choose option (1-7): ").strip()
+        
+        with track_action(f"tools.{TOOLS_ACTIONS.get(choice, 'invalid')}"):
+            if choice == "1":
+                rebuild_rollups(conn, user_id)
+            elif choice == "2":
+                check_indexes(conn, user_id)
+            elif choice == "3":
+                import_csv(conn, user_id)
+            elif choice == "4":
+                export_data(conn, user_id)
+            elif choice == "5":
+                startup_report()
+            elif choice == "6":
+                show_stats()
+            elif choice == "7":
+                break
+            else:
+                print("❌ Invalid choice. Please select 1-7")
+
 def main_menu(conn, user_id, monthly_budget):
     """Main application loop"""
     while True:
         display_menu()
-        choice = input("Choose option (1-12): ").strip()
-        
-        if choice == "1":
-            add_expense(conn, user_id)
-        elif choice == "2":
-            add_income(conn, user_id)
-        elif choice == "3":
-            view_expenses(conn, user_id)
-        elif choice == "4":
-            view_income(conn, user_id)
-        elif choice == "5":
-            edit_expense(conn, user_id)
-        elif choice == "6":
-            edit_income(conn, user_id)
-        elif choice == "7":
-            delete_expense(conn, user_id)
-        elif choice == "8":
-            delete_income(conn, user_id)
-        elif choice == "9":
-            show_summary(conn, user_id, monthly_budget)
-        elif choice == "10":
-            show_charts(conn, user_id)
-        elif  choice == "11":
-            get_ai_insights(conn,user_id,monthly_budget)
-        elif choice == "12":
-            print("\n👋 Thank you for using Expense Tracker!")
-            print("💾 Closing database connection...")
+        choice = prompt("Choose option (1-14): ").strip()
+        
+        # Time spent at prompt() inside the action is booked as input_seconds
+        with track_action(f"menu.{MENU_ACTIONS.get(choice, 'invalid')}"):
+            if choice == "1":
+                add_expense(conn, user_id)
+            elif choice == "2":
+                add_income(conn, user_id)
+            elif choice == "3":
+                view_expenses(conn, user_id)
+            elif choice == "4":
+                view_income(conn, user_id)
+            elif choice == "5":
+                edit_expense(conn, user_id)
+            elif choice == "6":
+                edit_income(conn, user_id)
+            elif choice == "7":
+                delete_expense(conn, user_id)
+            elif choice == "8":
+                delete_income(conn, user_id)
+            elif choice == "9":
+                show_summary(conn, user_id, monthly_budget)
+            elif choice == "10":
+                if CHARTS_HEADLESS:
+                    for path in render_charts(conn, user_id):
+                        print(f"🖼️  {path}")
+                else:
+                    show_charts(conn, user_id)
+            elif  choice == "11":
+                get_ai_insights(conn,user_id,monthly_budget)
+            elif choice == "12":
+                search_menu(conn, user_id)
+            elif choice == "13":
+                tools_menu(conn, user_id)
+            elif choice == "14":
+                print("\n👋 Thank you for using Expense Tracker!")
+                print("💾 Closing database connection...")
+                conn.close()
+                print("✅ Goodbye!")
+                break
+            else:
+                print("❌ Invalid choice. Please select 1-14")
+
+# ============================================================================
+# COMMAND LINE INTERFACE
+# ============================================================================
+# Running the script with a subcommand skips the menu. Human-readable messages
+# go to stderr; the command's result is written to stdout as a table, JSON or
+# CSV so scripts can consume it.
+def read_stdin_records(fmt):
+    """Read a batch of records from stdin as JSON (array or one object per line) or CSV"""
+    text = sys.stdin.read()
+    if fmt == "csv":
+        return list(csv.DictReader(text.splitlines()))
+    try:
+        records = json.loads(text)
+        return records if isinstance(records, list) else [records]
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def iso_date(text):
+    """argparse type for YYYY-MM-DD options; returns a date"""
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {text!r} (expected YYYY-MM-DD)") from None
+
+def add_records(conn, user_id, args, insert):
+    """Insert --stdin batches (one transaction) or the single record given by flags"""
+    if not args.stdin:
+        insert(conn, user_id, vars(args))
+        return {"added": 1}
+    return insert_records(conn, user_id, read_stdin_records(args.stdin), insert)
+
+def insert_records(conn, user_id, records, insert):
+    """Insert a batch of record dicts in one transaction; a bad record rolls back all of them"""
+    try:
+        for number, record in enumerate(records, 1):
+            try:
+                insert(conn, user_id, record, commit=False)
+            except ValueError as e:
+                raise ValueError(f"record {number}: {e}") from e
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {"added": len(records)}
+
+def record_field(record, name, required=False):
+    """Return a stripped string field of a CLI/JSON/CSV record ("" when missing)"""
+    value = record.get(name)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"{name} is required")
+    return value
+
+def insert_expense_record(conn, user_id, record, commit=True):
+    """insert_expense for a record given as a dict"""
+    insert_expense(
+        conn, user_id, record_field(record, "date") or None, record_field(record, "category", True),
+        record_field(record, "amount", True), record_field(record, "description"), commit=commit
+    )
+
+def insert_income_record(conn, user_id, record, commit=True):
+    """insert_income for a record given as a dict"""
+    insert_income(
+        conn, user_id, record_field(record, "date") or None,
+        record_field(record, "amount", True), record_field(record, "description"), commit=commit
+    )
+
+def cmd_add_expense(conn, user_id, monthly_budget, args):
+    return add_records(conn, user_id, args, insert_expense_record)
+
+def cmd_add_income(conn, user_id, monthly_budget, args):
+    return add_records(conn, user_id, args, insert_income_record)
+
+def list_records(conn, user_id, table, limit, anchor=None):
+    """Return (records, next_anchor) of one page of expenses or income as dicts"""
+    columns = EXPORT_COLUMNS[table][:1] + EXPORT_COLUMNS[table][2:]  # without user_id
+    rows = list(fetch_page(conn, table, ", ".join(columns), user_id, anchor, limit))
+    next_anchor = (rows[limit][1], rows[limit][0]) if len(rows) > limit else None
+    return [dict(zip(columns, row)) for row in rows[:limit]], next_anchor
+
+def cmd_list(conn, user_id, monthly_budget, args):
+    anchor = (args.before, MAX_ROW_ID) if args.before else None
+    return list_records(conn, user_id, args.table, args.limit, anchor)[0]
+
+def cmd_search(conn, user_id, monthly_budget, args):
+    columns = ["table", "id", "date", "category", "amount", "description"]
+    rows = search_transactions(conn, user_id, args.query, args.prefix, args.limit)
+    return [dict(zip(columns, row)) for row in rows]
+
+def cmd_delete(conn, user_id, monthly_budget, args):
+    remove = remove_expense if args.table == "expense" else remove_income
+    if not remove(conn, user_id, args.id):
+        raise ValueError(f"{args.table} {args.id} not found")
+    return {"deleted": args.id}
+
+def cmd_summary(conn, user_id, monthly_budget, args):
+    return get_summary(conn, user_id, monthly_budget)
+
+def cmd_charts(conn, user_id, monthly_budget, args):
+    return {"files": render_charts(conn, user_id, args.out, args.image_format)}
+
+def cmd_insights(conn, user_id, monthly_budget, args):
+    prompt = build_insights_prompt(conn, user_id, monthly_budget, args.mode, args.token_budget)
+    return {"insights": ask_gemini(prompt, use_cache=not args.no_cache, timeout=args.timeout) if prompt else None}
+
+def cmd_import(conn, user_id, monthly_budget, args):
+    source = sys.stdin if args.file == "-" else args.file
+    expenses, income, rejected = import_transactions(conn, user_id, source, args.layout, args.chunk_size)
+    return {"expenses": expenses, "income": income, "rejected": rejected}
+
+def cmd_export(conn, user_id, monthly_budget, args):
+    return export_transactions(
+        conn, args.out, args.file_format, None if args.all_users else user_id,
+        args.start, args.end, args.category, args.chunk_size
+    )
+
+def cmd_rebuild_rollups(conn, user_id, monthly_budget, args):
+    rebuild_rollups(conn, None if args.all_users else user_id)
+    return {"rebuilt": "all users" if args.all_users else user_id}
+
+def cmd_check_indexes(conn, user_id, monthly_budget, args):
+    return {"all_indexes_used": check_indexes(conn, user_id)}
+
+def cmd_memory_report(conn, user_id, monthly_budget, args):
+    report = frame_memory_report(conn, user_id)
+    return [
+        {"table": table, "column": column, "rows": info["rows"], **usage}
+        for table, info in report.items()
+        for column, usage in info["columns"].items()
+    ]
+
+def cmd_insights_batch(conn, user_id, monthly_budget, args):
+    return run_insights_batch(conn, args.concurrency, args.rate, use_cache=not args.no_cache)
+
+def cmd_stats(conn, user_id, monthly_budget, args):
+    if args.reset:
+        reset_stats()
+        return {"reset": True}
+    if args.dump:
+        dump_stats(args.dump, args.dump_format)
+        print(f"✅ Stats written to {args.dump}")
+    return stats_rows(stats_snapshot())
+
+def cmd_serve(conn, user_id, monthly_budget, args):
+    serve(args.host, args.port, args.workers)
+    return {"stopped": True}
+
+def cmd_migrate(conn, user_id, monthly_budget, args):
+    return {"schema_version": current_schema_version(conn)}
+
+def cmd_startup_report(conn, user_id, monthly_budget, args):
+    return startup_report()
+
+def build_parser():
+    """Build the argparse parser for the non-interactive subcommands"""
+    parser = argparse.ArgumentParser(
+        description="Expense Tracker. Run without a command for the interactive menu."
+    )
+    parser.add_argument("--user", default=os.getenv("EXPENSE_USER"),
+                        help="username (default: $EXPENSE_USER)")
+    parser.add_argument("--password", default=os.getenv("EXPENSE_PASSWORD"),
+                        help="password (default: $EXPENSE_PASSWORD)")
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table",
+                        help="output format")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    p = sub.add_parser("add-expense", help="add an expense, or a batch from stdin")
+    p.add_argument("--date", help="YYYY-MM-DD (default: today)")
+    p.add_argument("--category")
+    p.add_argument("--amount")
+    p.add_argument("--description", default="")
+    p.add_argument("--stdin", choices=["json", "csv"], help="read a batch of records from stdin")
+    p.set_defaults(handler=cmd_add_expense)
+    
+    p = sub.add_parser("add-income", help="add an income record, or a batch from stdin")
+    p.add_argument("--date", help="YYYY-MM-DD (default: today)")
+    p.add_argument("--amount")
+    p.add_argument("--description", default="")
+    p.add_argument("--stdin", choices=["json", "csv"], help="read a batch of records from stdin")
+    p.set_defaults(handler=cmd_add_income)
+    
+    p = sub.add_parser("list", help="list expenses or income, newest first")
+    p.add_argument("table", choices=["expenses", "income"])
+    p.add_argument("--limit", type=int, default=PAGE_SIZE)
+    p.add_argument("--before", type=iso_date, help="only records on or before this date (YYYY-MM-DD)")
+    p.set_defaults(handler=cmd_list)
+    
+    p = sub.add_parser("search", help="find expenses and income by description or category")
+    p.add_argument("query")
+    p.add_argument("--prefix", action="store_true", help="match only at the start of a word")
+    p.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    p.set_defaults(handler=cmd_search)
+    
+    p = sub.add_parser("delete", help="delete an expense or income record")
+    p.add_argument("table", choices=["expense", "income"])
+    p.add_argument("id", type=int)
+    p.set_defaults(handler=cmd_delete)
+    
+    p = sub.add_parser("summary", help="income, expenses, savings and budget status")
+    p.set_defaults(handler=cmd_summary)
+    
+    p = sub.add_parser("charts", help="render the charts to image files")
+    p.add_argument("--out", help=f"output directory (default: {CHART_CACHE_DIR})")
+    p.add_argument("--as", dest="image_format", choices=["png", "svg"], default="png")
+    p.set_defaults(handler=cmd_charts)
+    
+    p = sub.add_parser("insights", help="AI savings advice from Gemini")
+    p.add_argument("--no-cache", action="store_true", help="always call the model")
+    p.add_argument("--timeout", type=float, help=f"seconds to wait for the model (default {AI_TIMEOUT:g})")
+    p.add_argument("--mode", choices=sorted(PROMPT_BUILDERS), help=f"prompt data (default {AI_PROMPT_MODE})")
+    p.add_argument("--token-budget", type=int, help=f"max tokens of prompt data (default {AI_PROMPT_TOKEN_BUDGET})")
+    p.set_defaults(handler=cmd_insights)
+    
+    p = sub.add_parser("memory-report", help="memory used by your loaded analytics frames")
+    p.set_defaults(handler=cmd_memory_report)
+    
+    p = sub.add_parser("insights-batch", help="generate AI insights for every user into ai_insights")
+    p.add_argument("--concurrency", type=int, help=f"parallel model calls (default {AI_BATCH_CONCURRENCY})")
+    p.add_argument("--rate", type=float, help=f"max model calls per second (default {AI_BATCH_RATE:g})")
+    p.add_argument("--no-cache", action="store_true", help="always call the model")
+    p.set_defaults(handler=cmd_insights_batch, needs_user=False)
+    
+    p = sub.add_parser("import", help="bulk import a CSV file ('-' for stdin)")
+    p.add_argument("file")
+    p.add_argument("--layout", choices=list(IMPORT_FORMATS), default="expenses")
+    p.add_argument("--chunk-size", type=int)
+    p.set_defaults(handler=cmd_import)
+    
+    p = sub.add_parser("export", help="export expenses and income to CSV or Parquet")
+    p.add_argument("--out", required=True, help="output directory")
+    p.add_argument("--as", dest="file_format", choices=["csv", "parquet"], default="csv")
+    p.add_argument("--from", dest="start", type=iso_date, help="first date (YYYY-MM-DD)")
+    p.add_argument("--to", dest="end", type=iso_date, help="last date (YYYY-MM-DD)")
+    p.add_argument("--category", help="only expenses in this category")
+    p.add_argument("--chunk-size", type=int)
+    p.add_argument("--all-users", action="store_true", help="export every user's data")
+    p.set_defaults(handler=cmd_export, user_optional=True)
+    
+    p = sub.add_parser("rebuild-rollups", help="recompute the monthly rollup table")
+    p.add_argument("--all-users", action="store_true")
+    p.set_defaults(handler=cmd_rebuild_rollups, user_optional=True)
+    
+    p = sub.add_parser("check-indexes", help="EXPLAIN the hot queries")
+    p.set_defaults(handler=cmd_check_indexes)
+    
+    p = sub.add_parser("serve", help="run the multi-user HTTP/JSON API")
+    p.add_argument("--host", default=API_HOST)
+    p.add_argument("--port", type=int, default=API_PORT)
+    p.add_argument("--workers", type=int, help=f"request worker threads (default {API_WORKERS})")
+    p.set_defaults(handler=cmd_serve, needs_db=False)
+    
+    p = sub.add_parser("migrate", help="apply pending schema migrations")
+    p.set_defaults(handler=cmd_migrate, needs_user=False)
+    
+    p = sub.add_parser("startup-report", help="measure import time at startup")
+    p.set_defaults(handler=cmd_startup_report, needs_db=False)
+    
+    p = sub.add_parser("stats", help="per-action timing and query totals recorded so far")
+    p.add_argument("--dump", metavar="FILE", help="also write the totals to FILE")
+    p.add_argument("--dump-format", choices=["json", "prometheus"], default="json")
+    p.add_argument("--reset", action="store_true", help="clear the recorded totals")
+    p.set_defaults(handler=cmd_stats, needs_db=False)
+    
+    return parser
+
+def emit(data, fmt, out):
+    """Write a command result to out as a table, JSON or CSV"""
+    if fmt == "json":
+        json.dump(data, out, indent=2, default=str)
+        out.write("\n")
+        return
+    
+    rows = data if isinstance(data, list) else [data]
+    if fmt == "csv":
+        if rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+    
+    if isinstance(data, dict):
+        for key, value in data.items():
+            out.write(f"{key}: {value}\n")
+    else:
+        for row in rows:
+            out.write("  ".join(str(value) for value in row.values()) + "\n")
+
+def run_cli(argv):
+    """Run one subcommand and return the process exit code"""
+    args = build_parser().parse_args(argv)
+    out = sys.stdout
+    atexit.register(save_stats)
+    
+    with contextlib.redirect_stdout(sys.stderr):
+        if not getattr(args, "needs_db", True):
+            emit(args.handler(None, None, None, args), args.format, out)
+            return 0
+        
+        try:
+            conn = get_connection()
+        except DB_ERRORS as e:
+            print(f"❌ Error connecting to {storage.describe()}: {e}")
+            return 1
+        
+        try:
+            migrate(conn)
+            user_id = monthly_budget = None
+            all_users = getattr(args, "all_users", False)
+            if getattr(args, "needs_user", True) and not (getattr(args, "user_optional", False) and all_users):
+                if not args.user or args.password is None:
+                    print("❌ --user and --password (or EXPENSE_USER / EXPENSE_PASSWORD) are required")
+                    return 2
+                user_id, monthly_budget = authenticate(conn, args.user, args.password)
+                if user_id is None:
+                    print("❌ Invalid username or password!")
+                    return 2
+            
+            with track_action(f"cli.{args.command}"):
+                result = args.handler(conn, user_id, monthly_budget, args)
+        except Exception as e:
+            print(f"❌ {args.command} failed: {e}")
+            return 1
+        finally:
             conn.close()
-            print("✅ Goodbye!")
-            break
-        else:
-            print("❌ Invalid choice. Please select 1-11")
+    
+    emit(result, args.format, out)
+    return 0
+
+# ============================================================================
+# HTTP API
+# ============================================================================
+# `serve` exposes the tracker as a JSON API so one process serves many users.
+# Connections are handed to a fixed pool of API_WORKERS threads, and each
+# request borrows a database connection (from the MySQL pool) only while its
+# handler runs. POST /api/login trades credentials for a bearer token that
+# the other endpoints expect in the Authorization header; sessions live in
+# the server process and expire API_SESSION_TTL seconds after their last use.
+#
+#   POST   /api/login                  {"username", "password"} -> {"token"}
+#   POST   /api/logout
+#   GET    /api/expenses|income        ?limit=&before=YYYY-MM-DD&before_id=
+#   POST   /api/expenses|income        one record or a list (one transaction)
+#   PUT    /api/expenses|income/<id>   only the fields to change
+#   DELETE /api/expenses|income/<id>
+#   GET    /api/summary
+#   GET    /api/charts                 category and monthly totals
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "16"))
+API_SESSION_TTL = int(os.getenv("API_SESSION_TTL", str(12 * 3600)))
+API_REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "5"))  # slow clients are dropped after this
+API_MAX_BODY = int(os.getenv("API_MAX_BODY", str(1024 * 1024)))
+API_MAX_LIMIT = 500
+
+class ApiError(Exception):
+    """An error answered with its HTTP status and message"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class SessionStore:
+    """Bearer tokens of logged-in users, each expiring ttl seconds after its last use"""
+    def __init__(self, ttl=None):
+        self.ttl = API_SESSION_TTL if ttl is None else ttl
+        self.sessions = {}
+        self.lock = threading.Lock()
+    
+    def create(self, user_id, monthly_budget):
+        token = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self.lock:
+            for expired in [t for t, session in self.sessions.items() if session["expires"] <= now]:
+                del self.sessions[expired]
+            self.sessions[token] = {
+                "token": token, "user_id": user_id, "monthly_budget": monthly_budget, "expires": now + self.ttl
+            }
+        return token
+    
+    def get(self, token):
+        """Return the live session of token (extending it), or None"""
+        now = time.monotonic()
+        with self.lock:
+            session = self.sessions.get(token)
+            if session is None or session["expires"] <= now:
+                self.sessions.pop(token, None)
+                return None
+            session["expires"] = now + self.ttl
+            return session
+    
+    def drop(self, token):
+        with self.lock:
+            self.sessions.pop(token, None)
+
+sessions = SessionStore()
+
+API_TABLES = {
+    "expenses": (insert_expense_record, update_expense, remove_expense),
+    "income": (insert_income_record, update_income, remove_income),
+}
+
+def query_int(query, name, default=None):
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer") from None
+
+def api_body(body):
+    if not isinstance(body, dict):
+        raise ApiError(400, "expected a JSON object")
+    return body
+
+def api_login(conn, session, path_args, query, body):
+    body = api_body(body)
+    user_id, monthly_budget = authenticate(
+        conn, record_field(body, "username", True), record_field(body, "password", True)
+    )
+    if user_id is None:
+        raise ApiError(401, "invalid username or password")
+    return 200, {"token": sessions.create(user_id, monthly_budget), "expires_in": sessions.ttl}
+
+def api_logout(conn, session, path_args, query, body):
+    sessions.drop(session["token"])
+    return 200, {"logged_out": True}
+
+def api_list(conn, session, path_args, query, body):
+    table = path_args[0]
+    limit = min(max(query_int(query, "limit", PAGE_SIZE), 1), API_MAX_LIMIT)
+    before = query.get("before")
+    if before:
+        try:
+            before = datetime.strptime(before, "%Y-%m-%d").date()
+        except ValueError:
+            raise ApiError(400, "before must be a date (YYYY-MM-DD)") from None
+    anchor = (before, query_int(query, "before_id", MAX_ROW_ID)) if before else None
+    records, next_anchor = list_records(conn, session["user_id"], table, limit, anchor)
+    result = {"records": records, "next": None}
+    if next_anchor:
+        result["next"] = {"before": next_anchor[0], "before_id": next_anchor[1]}
+    return 200, result
+
+def api_create(conn, session, path_args, query, body):
+    insert = API_TABLES[path_args[0]][0]
+    records = body if isinstance(body, list) else [api_body(body)]
+    if not all(isinstance(record, dict) for record in records):
+        raise ApiError(400, "expected a JSON object or a list of them")
+    return 201, insert_records(conn, session["user_id"], records, insert)
+
+def api_update(conn, session, path_args, query, body):
+    table, record_id = path_args[0], int(path_args[1])
+    body = api_body(body)
+    fields = ["date", "category", "amount", "description"] if table == "expenses" else ["date", "amount", "description"]
+    changes = [record_field(body, name) or None for name in fields]
+    if not API_TABLES[table][1](conn, session["user_id"], record_id, *changes):
+        raise ApiError(404, f"{table} {record_id} not found")
+    return 200, {"updated": record_id}
+
+def api_delete(conn, session, path_args, query, body):
+    table, record_id = path_args[0], int(path_args[1])
+    if not API_TABLES[table][2](conn, session["user_id"], record_id):
+        raise ApiError(404, f"{table} {record_id} not found")
+    return 200, {"deleted": record_id}
+
+def api_summary(conn, session, path_args, query, body):
+    return 200, get_summary(conn, session["user_id"], session["monthly_budget"])
+
+def api_charts(conn, session, path_args, query, body):
+    """Return the data behind the charts, for the client to draw"""
+    categories = get_category_totals(conn, session["user_id"])
+    monthly = get_monthly_frame(conn, session["user_id"])
+    return 200, {
+        "categories": [{"category": name, "total": total} for name, total in categories.items()],
+        "monthly": [
+            {"month": month, "expense": row.expense, "income": row.income}
+            for month, row in zip(monthly.index, monthly.itertuples(index=False))
+        ],
+    }
+
+# (method, path pattern, handler, needs a session)
+API_ROUTES = [
+    ("POST", r"/api/login", api_login, False),
+    ("POST", r"/api/logout", api_logout, True),
+    ("GET", r"/api/(expenses|income)", api_list, True),
+    ("POST", r"/api/(expenses|income)", api_create, True),
+    ("PUT", r"/api/(expenses|income)/(\d+)", api_update, True),
+    ("DELETE", r"/api/(expenses|income)/(\d+)", api_delete, True),
+    ("GET", r"/api/summary", api_summary, True),
+    ("GET", r"/api/charts", api_charts, True),
+]
+API_ROUTES = [(method, re.compile(pattern), handler, auth) for method, pattern, handler, auth in API_ROUTES]
+
+def resolve_route(method, path):
+    """Return (handler, path_args, needs_session) for a request, or raise 404/405"""
+    allowed = False
+    for route_method, pattern, handler, auth in API_ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            if route_method == method:
+                return handler, match.groups(), auth
+            allowed = True
+    raise ApiError(405 if allowed else 404, "method not allowed" if allowed else "not found")
+
+class ApiHandler(http.server.BaseHTTPRequestHandler):
+    """Parses JSON requests, checks the session and runs the route on a borrowed connection"""
+    # HTTP/1.0: one request per connection, so idle keep-alive clients never
+    # hold one of the fixed workers while other users queue behind them
+    protocol_version = "HTTP/1.0"
+    server_version = "ExpenseTracker"
+    timeout = API_REQUEST_TIMEOUT
+    
+    def do_GET(self):
+        self.dispatch("GET")
+    
+    def do_POST(self):
+        self.dispatch("POST")
+    
+    def do_PUT(self):
+        self.dispatch("PUT")
+    
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+    
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > API_MAX_BODY:
+            self.close_connection = True  # the unread body cannot be skipped
+            raise ApiError(413, f"request body over {API_MAX_BODY} bytes")
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError(400, "invalid JSON body") from None
+    
+    def session(self):
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        session = sessions.get(token.strip()) if scheme.lower() == "bearer" else None
+        if session is None:
+            raise ApiError(401, "missing or expired token")
+        return session
+    
+    def dispatch(self, method):
+        url = urllib.parse.urlsplit(self.path)
+        try:
+            body = self.read_body()
+            handler, path_args, needs_session = resolve_route(method, url.path)
+            session = self.session() if needs_session else None
+            query = dict(urllib.parse.parse_qsl(url.query))
+            
+            with track_action(f"api.{handler.__name__[4:]}"):
+                conn = get_connection()
+                try:
+                    status, data = handler(conn, session, path_args, query, body)
+                finally:
+                    # End whatever transaction is still open (reads included) so the
+                    # next request on this pooled connection gets a fresh snapshot
+                    conn.rollback()
+                    conn.close()
+        except ApiError as e:
+            status, data = e.status, {"error": str(e)}
+        except ValueError as e:
+            status, data = 400, {"error": str(e)}
+        except mysql.connector.errors.PoolError:
+            status, data = 503, {"error": "all database connections are busy"}
+        except DB_ERRORS as e:
+            self.log_error("database error: %s", e)
+            status, data = 500, {"error": "database error"}
+        except Exception as e:
+            self.log_error("%s failed: %r", url.path, e)
+            status, data = 500, {"error": "internal error"}
+        
+        payload = json.dumps(data, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+class ApiServer(http.server.HTTPServer):
+    """HTTPServer that hands each connection to a fixed pool of worker threads"""
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, address, workers=None):
+        super().__init__(address, ApiHandler)
+        self.workers = workers or API_WORKERS
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="api")
+    
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+def serve(host=None, port=None, workers=None):
+    """Migrate the schema, then serve the API until interrupted"""
+    conn = get_connection()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+    
+    server = ApiServer((host or API_HOST, API_PORT if port is None else port), workers)
+    print(f"✅ Serving the API on http://{server.server_address[0]}:{server.server_address[1]} "
+          f"with {server.workers} workers ({storage.describe()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping the API server")
+    finally:
+        server.server_close()
 
 # ============================================================================
 # MAIN PROGRAM
@@ -741,14 +3914,15 @@ def main():
     
     # Create database connection
     conn = create_connection()
+    atexit.register(save_stats)
     
-    # Create tables if they don't exist
-    create_tables(conn)
+    # Bring the schema up to date (a single lookup once it is)
+    migrate(conn)
     
     # Login/Signup 
     print("\n1. Sign Up (New User)")
     print("2. Login (Existing User)")
-    choice = input("\nChoose option: ").strip()
+    choice = prompt("\nChoose option: ").strip()
     
     if choice == "1":
         signup(conn)
@@ -768,4 +3942,6 @@ def main():
 # ENTRY POINT
 # ============================================================================
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     main()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import expenseTrackerUpdated as et
+
+class FakeClock:
+    """Stands in for time.time so cache ages can be set exactly"""
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(et.time, "time", fake)
+    return fake
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    """A fresh on-disk response cache installed as the process-wide one"""
+    cache = et.ResponseCache(path=str(tmp_path / "ai.sqlite3"))
+    monkeypatch.setattr(et, "_response_cache", cache)
+    yield cache
+    cache.db.close()
@@ -0,0 +1,82 @@
+import pytest
+
+import expenseTrackerUpdated as et
+
+class SleepClock:
+    """Stands in for time.monotonic/time.sleep so sleeping just moves the clock"""
+    def __init__(self):
+        self.now = 0.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    """A connection to a fresh SQLite database at the current schema"""
+    monkeypatch.setattr(et, "storage", et.SQLiteBackend(str(tmp_path / "expenses.db")))
+    monkeypatch.setattr(et, "frame_cache", et.FrameCache(et.FRAME_CACHE_MAX_BYTES))
+    monkeypatch.setattr(et, "_categories", {})
+    conn = et.get_connection()
+    et.migrate(conn)
+    yield conn
+    conn.close()
+
+def add_user(conn, username, expenses=()):
+    et.execute_write(conn, "INSERT INTO users (username, password) VALUES (%s, %s)", (username, "x"))
+    user_id = et.fetch_one(conn, "SELECT id FROM users WHERE username=%s", (username,))[0]
+    for date, category, amount in expenses:
+        et.insert_expense(conn, user_id, date, category, amount, "", commit=False)
+    conn.commit()
+    return user_id
+
+def stored_insights(conn):
+    return et.fetch_all(conn, "SELECT user_id, model, status, insights, error FROM ai_insights ORDER BY user_id")
+
+def test_stores_insights_for_users_with_expenses(conn):
+    alice = add_user(conn, "alice", [("2024-01-05", "Food", 120), ("2024-01-09", "Rent", 9000)])
+    bob = add_user(conn, "bob", [("2024-02-01", "Transport", 45.5)])
+    add_user(conn, "carol")
+    model = et.StubModel("stub-model")
+    
+    metrics = et.run_insights_batch(conn, concurrency=2, rate=1000, use_cache=False, model=model)
+    
+    assert (metrics["users"], metrics["succeeded"], metrics["failed"]) == (2, 2, 0)
+    assert model.calls == 2
+    rows = stored_insights(conn)
+    assert [(row[0], row[1], row[2]) for row in rows] == [(alice, "stub:stub-model", "ok"), (bob, "stub:stub-model", "ok")]
+    assert all(row[3].startswith("[stub-model] Stub advice") for row in rows)
+
+def test_records_the_configured_model(conn, monkeypatch):
+    monkeypatch.setattr(et, "AI_BACKEND", "stub")
+    add_user(conn, "alice", [("2024-01-05", "Food", 120)])
+    
+    et.run_insights_batch(conn, rate=1000, use_cache=False)
+    
+    assert stored_insights(conn)[0][1:3] == (f"stub:{et.AI_MODEL}", "ok")
+
+def test_failed_calls_are_stored_as_errors(conn, monkeypatch):
+    monkeypatch.setattr(et, "AI_RETRIES", 0)
+    add_user(conn, "alice", [("2024-01-05", "Food", 120)])
+    
+    metrics = et.run_insights_batch(conn, rate=1000, use_cache=False, model=et.StubModel("stub-model", failures=1))
+    
+    assert (metrics["succeeded"], metrics["failed"]) == (0, 1)
+    _, model, status, insights, error = stored_insights(conn)[0]
+    assert (model, status, insights) == ("stub:stub-model", "error", None)
+    assert error.startswith("TransientModelError")
+
+def test_rate_limiter_allows_a_burst_then_spaces_calls(monkeypatch):
+    clock = SleepClock()
+    monkeypatch.setattr(et.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(et.time, "sleep", clock.sleep)
+    limiter = et.RateLimiter(rate=2, burst=2)
+    
+    calls = []
+    for _ in range(5):
+        limiter.acquire()
+        calls.append(clock.now)
+    
+    assert calls == pytest.approx([0, 0, 0.5, 1.0, 1.5])
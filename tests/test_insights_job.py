@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import expenseTrackerUpdated as et
+
+class BrokenModel:
+    """Model whose every call fails with a non-transient error"""
+    model_name = "broken"
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def generate_content(self, prompt, stream=False, request_options=None):
+        self.calls += 1
+        raise ValueError("invalid prompt")
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(et, "AI_RETRY_BACKOFF", 0.001)
+
+def test_streams_the_whole_response(response_cache):
+    model = et.StubModel("stub-model")
+    chunks = list(et.InsightsJob("prompt", model=model).stream())
+    assert len(chunks) > 1
+    assert "".join(chunks).startswith("[stub-model] Stub advice")
+
+def test_second_job_is_served_from_cache(response_cache):
+    first = et.StubModel("stub-model")
+    second = et.StubModel("stub-model")
+    assert et.InsightsJob("prompt", model=first).result() == et.InsightsJob("prompt", model=second).result()
+    assert (first.calls, second.calls) == (1, 0)
+
+def test_cache_is_keyed_by_the_model_used(response_cache, monkeypatch):
+    et.InsightsJob("prompt", model=et.StubModel("other-model")).result()
+    monkeypatch.setattr(et, "get_model", lambda model_name=None: et.StubModel(et.AI_MODEL))
+    assert et.ask_gemini("prompt").startswith(f"[{et.AI_MODEL}]")
+
+def test_retries_transient_failures():
+    model = et.StubModel("stub-model", failures=2)
+    assert et.InsightsJob("prompt", retries=3, use_cache=False, model=model).result()
+    assert model.calls == 3
+
+def test_gives_up_after_the_last_retry():
+    model = et.StubModel("stub-model", failures=5)
+    with pytest.raises(et.TransientModelError):
+        et.InsightsJob("prompt", retries=1, use_cache=False, model=model).result()
+    assert model.calls == 2
+
+def test_does_not_retry_other_errors():
+    model = BrokenModel()
+    with pytest.raises(ValueError):
+        et.InsightsJob("prompt", retries=3, use_cache=False, model=model).result()
+    assert model.calls == 1
+
+def test_backoff_grows_exponentially(monkeypatch):
+    delays = []
+    monkeypatch.setattr(et, "AI_RETRY_BACKOFF", 1.0)
+    monkeypatch.setattr(et.random, "uniform", lambda low, high: 1.0)
+    job = et.InsightsJob("prompt", retries=3, use_cache=False, model=et.StubModel("stub-model", failures=3))
+    monkeypatch.setattr(job.cancelled, "wait", lambda timeout: delays.append(timeout) or False)
+    assert job.result()
+    assert delays == [1.0, 2.0, 4.0]
+
+def test_deadline_raises_timeout():
+    model = et.StubModel("stub-model", latency=2)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        et.InsightsJob("prompt", timeout=0.1, use_cache=False, model=model).result()
+    assert time.monotonic() - started < 1
+
+def test_cancel_stops_streaming_and_skips_the_cache(response_cache):
+    model = et.StubModel("stub-model", chunk_delay=0.05)
+    job = et.InsightsJob("prompt", model=model)
+    stream = job.stream()
+    next(stream)
+    job.cancel()
+    job.thread.join(1)
+    
+    assert not job.thread.is_alive()
+    assert job.chunks.qsize() <= 2
+    assert response_cache.get(et.model_cache_key(model), "prompt") is None
+
+def test_cancel_interrupts_the_backoff_wait(monkeypatch):
+    monkeypatch.setattr(et, "AI_RETRY_BACKOFF", 30)
+    job = et.InsightsJob("prompt", retries=1, use_cache=False, model=et.StubModel("stub-model", failures=1)).start()
+    time.sleep(0.05)
+    job.cancel()
+    job.thread.join(1)
+    assert not job.thread.is_alive()
@@ -0,0 +1,55 @@
+import expenseTrackerUpdated as et
+
+def make_cache(tmp_path, **limits):
+    return et.ResponseCache(path=str(tmp_path / "cache.sqlite3"), **limits)
+
+def test_hit_and_miss(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    assert cache.get("stub:a", "prompt") is None
+    cache.put("stub:a", "prompt", "advice")
+    assert cache.get("stub:a", "prompt") == "advice"
+    assert cache.get("stub:b", "prompt") is None
+    assert cache.get("stub:a", "other prompt") is None
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl=60)
+    cache.put("stub:a", "prompt", "advice")
+    clock.advance(59)
+    assert cache.get("stub:a", "prompt") == "advice"
+    clock.advance(2)
+    assert cache.get("stub:a", "prompt") is None
+
+def test_evicts_least_recently_used_beyond_max_entries(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put("stub:a", "one", "1")
+    clock.advance(1)
+    cache.put("stub:a", "two", "2")
+    clock.advance(1)
+    assert cache.get("stub:a", "one") == "1"  # "two" is now the least recently used
+    clock.advance(1)
+    cache.put("stub:a", "three", "3")
+    
+    assert cache.get("stub:a", "two") is None
+    assert cache.get("stub:a", "one") == "1"
+    assert cache.get("stub:a", "three") == "3"
+
+def test_evicts_beyond_max_bytes(tmp_path, clock):
+    cache = make_cache(tmp_path, max_bytes=10)
+    cache.put("stub:a", "old", "x" * 6)
+    clock.advance(1)
+    cache.put("stub:a", "new", "y" * 6)
+    
+    assert cache.get("stub:a", "old") is None
+    assert cache.get("stub:a", "new") == "y" * 6
+
+def test_ask_gemini_serves_repeated_prompts_from_cache(response_cache, monkeypatch):
+    model = et.StubModel("stub-model")
+    monkeypatch.setattr(et, "get_model", lambda model_name=None: model)
+    
+    first = et.ask_gemini("How can I save?")
+    second = et.ask_gemini("How can I save?")
+    
+    assert first == second
+    assert model.calls == 1
+    assert et.ask_gemini("How can I save?", use_cache=False) == first
+    assert model.calls == 2